@@ -11,6 +11,13 @@ from loguru import logger
 from config_manager import config_manager
 from system_info import system_info
 from router import setup_routes
+from download_manager import download_manager
+from core_verifier import core_verifier
+from process_supervisor import process_supervisor
+import core_status
+from log_manager import log_manager
+from log_index import log_index
+from task_progress import task_progress
 
 
 def initialize_config():
@@ -25,6 +32,9 @@ def initialize_config():
     
     # 初始化系统信息
     system_info.initialize()
+    
+    # 启动时扫描一次已存在的核心进程，之后由进程监督器跟踪
+    process_supervisor.initialize(system_info.get_core_filename())
 
 
 def main():
@@ -36,6 +46,20 @@ def main():
     # 设置路由
     setup_routes()
     
+    # 启动时初始化核心状态总线并开始后台校验核心文件
+    app.on_startup(core_status.initialize)
+    app.on_startup(core_verifier.start)
+    app.on_startup(task_progress.start)
+    # 在后台压缩上次运行留下的未压缩归档日志
+    app.on_startup(log_manager.compress_pending_archives)
+    
+    # 程序退出时停止后台任务并关闭共享的下载会话
+    app.on_shutdown(core_verifier.stop)
+    app.on_shutdown(task_progress.stop)
+    app.on_shutdown(download_manager.close)
+    app.on_shutdown(log_manager.close)
+    app.on_shutdown(log_index.close)
+    
     # 设置UI启动参数
     ui.run(
         title='JiJiDown Desktop',
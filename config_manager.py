@@ -50,6 +50,12 @@ class ConfigManager:
             'validator': lambda x: x in ['info', 'warning', 'error', 'debug', 'silent'],
             'description': '日志级别'
         },
+        'core_backend': {
+            'path': 'launcher.core-backend',
+            'default': 'asyncio',
+            'validator': lambda x: x in ['asyncio', 'thread'],
+            'description': '核心进程的运行方式，asyncio为事件循环子进程，thread为子进程加输出读取线程'
+        },
         'max_task': {
             'path': 'download-task.max-task',
             'default': 2,
@@ -63,6 +69,30 @@ class ConfigManager:
             'validator': lambda x: 0 <= x <= 1048576,
             'description': '下载速度限制'
         },
+        'part_workers': {
+            'path': 'jdm.part-workers',
+            'default': 4,
+            'validator': lambda x: isinstance(x, int) and 1 <= x <= 32,
+            'description': '单个文件的分段下载数'
+        },
+        'min_split_size': {
+            'path': 'jdm.min-split-size',
+            'default': 1048576,
+            'validator': lambda x: isinstance(x, int) and x >= 1024,
+            'description': '分段下载的最小分段大小'
+        },
+        'hash_manifest_ttl': {
+            'path': 'launcher.hash-manifest-ttl',
+            'default': 3600,
+            'validator': lambda x: isinstance(x, (int, float)) and x >= 0,
+            'description': '官方hash清单的有效期（秒），超过后重新验证'
+        },
+        'hash_manifest_retry_interval': {
+            'path': 'launcher.hash-manifest-retry-interval',
+            'default': 60,
+            'validator': lambda x: isinstance(x, (int, float)) and x >= 0,
+            'description': '重新验证hash清单失败后再次尝试的最短间隔（秒）'
+        },
         'user_info': {
             'path': 'user-info',
             'default': dict,
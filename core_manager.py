@@ -1,18 +1,38 @@
-import requests
+import aiohttp
 import asyncio
+import codecs
+import os
+import re
+import signal
 from pathlib import Path
-from typing import Optional, Callable
+from typing import Optional, Callable, Mapping, Tuple
 import time
 import hashlib
 import subprocess
 import threading
 from loguru import logger
 from system_info import system_info
+from config_manager import config_manager
+from download_manager import ProgressAccountant, download_manager
+from hash_cache import hash_cache
+from hash_manifest import hash_manifest
+from log_bridge import LogBridge
+from task_registry import TaskRegistry
+from log_parser import LogRecordBuffer, parse_record, strip_ansi, classify_level
+from log_manager import log_manager
+from process_supervisor import process_supervisor
+
+# 核心输出的换行符，与文本模式的通用换行一致
+NEWLINE_PATTERN = re.compile(r'\r\n|\r|\n')
+
 
 class CoreManager:
     def __init__(self):
-        self.download_tasks = {}
+        # 启动器自身的下载任务，已结束的任务有数量和时间上限
+        self.download_tasks = TaskRegistry()
         self.progress_callbacks = {}
+        # 下载任务状态变化的监听函数，接收(任务ID, 任务信息)
+        self.task_listeners = []
         self.core_info = {
             'exist': False,
             'filename': '',
@@ -22,6 +42,14 @@ class CoreManager:
         self.core_process = None
         self.is_running = False
         self.log_callbacks = []
+        # asyncio子进程模式下读取核心输出的任务
+        self._output_task: Optional[asyncio.Task] = None
+        # asyncio子进程所属的事件循环，同步停止核心时需要在该循环中等待进程退出
+        self._core_loop: Optional[asyncio.AbstractEventLoop] = None
+        # 最近的核心日志结构化记录，筛选和统计时无需重新解析文本
+        self.log_records = LogRecordBuffer()
+        # 读取线程通过日志桥把日志交给事件循环分发
+        self.log_bridge = LogBridge(self._dispatch_logs)
     
     def get_system_info(self):
         """获取系统信息用于调试"""
@@ -32,41 +60,40 @@ class CoreManager:
         return system_info.get_core_filename()
     
     def get_official_hash(self, filename: str) -> Optional[str]:
-        """从官方获取文件的SHA256哈希值"""
-        try:
-            hash_url = "https://jj.紫灵.top/PC/ReWPF/core/JiJiDownCore-hash.txt"
-            response = requests.get(hash_url, timeout=10)
-            response.raise_for_status()
-            
-            # 解析hash文件内容
-            hash_content = response.text
-            for line in hash_content.split('\n'):
-                line = line.strip()
-                if '|' in line and filename in line:
-                    parts = line.split('|')
-                    if len(parts) >= 3 and parts[2].strip() == filename:
-                        return parts[0].strip()
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"获取官方hash失败: {str(e)}")
-            return None
-        
+        """从官方hash清单获取文件的SHA256哈希值，清单在有效期内不会重复下载"""
+        return hash_manifest.get_hash(filename)
     
     def calculate_file_hash(self, file_path: str) -> Optional[str]:
-        """计算文件的SHA256哈希值"""
+        """计算文件的SHA256哈希值，文件未变化时直接使用缓存"""
         try:
+            path = Path(file_path).resolve()
+            stat = path.stat()
+            cached = hash_cache.get(str(path), stat)
+            if cached:
+                return cached
+            
             sha256_hash = hashlib.sha256()
-            with open(file_path, "rb") as f:
+            with open(path, "rb") as f:
                 # 分块读取文件，避免大文件内存问题
-                for byte_block in iter(lambda: f.read(4096), b""):
+                for byte_block in iter(lambda: f.read(1024 * 1024), b""):
                     sha256_hash.update(byte_block)
-            return sha256_hash.hexdigest()
+            digest = sha256_hash.hexdigest()
+            
+            # 计算期间文件没有被修改时才写入缓存
+            if path.stat().st_mtime_ns == stat.st_mtime_ns:
+                hash_cache.put(str(path), digest, stat)
+            return digest
         except Exception as e:
             logger.error(f"计算文件hash失败: {str(e)}")
             return None
     
+    def seed_file_hash(self, file_path: str, digest: str) -> None:
+        """把已知的hash值写入缓存，避免再次读取整个文件"""
+        try:
+            hash_cache.put(file_path, digest)
+        except Exception as e:
+            logger.error(f"写入hash缓存失败: {str(e)}")
+    
     def check_core_hash(self, resources_path: str = "./resources") -> dict:
         """检查核心文件的hash值是否匹配"""
         core_filename = self.get_core_filename()
@@ -82,11 +109,9 @@ class CoreManager:
                 'message': '核心文件不存在'
             }
         
-        # 获取官方hash值
+        # 获取官方hash值，离线时使用上次获取的清单
         official_hash = self.get_official_hash(core_filename)
-        hash_source = 'official'
-        
-        # 如果无法获取官方hash，使用备用hash
+        hash_source = 'cache' if hash_manifest.stale else 'official'
         
         if not official_hash:
             logger.error("无法获取在线hash值")
@@ -145,7 +170,9 @@ class CoreManager:
         return self.core_info.copy()
     
     async def download_file(self, url: str, filename: str, save_path: str = "./resources", 
-                          progress_callback: Optional[Callable] = None) -> dict:
+                          progress_callback: Optional[Callable] = None,
+                          chunk_size: Optional[int] = None,
+                          verify_hash: bool = True) -> dict:
         """
         异步下载文件
         
@@ -154,90 +181,64 @@ class CoreManager:
             filename: 保存的文件名
             save_path: 保存路径
             progress_callback: 进度回调函数
+            chunk_size: 每次读取的字节数，为None时使用下载管理器的默认值
+            verify_hash: 是否在替换文件前校验官方hash值（官方hash列表中没有该文件时跳过）
         
         Returns:
             下载结果字典
         """
-        task_id = f"{filename}_{int(time.time())}"
-        
         logger.info(f"开始下载文件: {filename}, URL: {url}")
         
         # 创建保存目录 - 使用Pathlib进行路径处理
         save_dir = Path(save_path).resolve()
         save_dir.mkdir(parents=True, exist_ok=True)
         
-        file_path = save_dir / filename
-        
         # 确保文件名安全 - 移除路径分隔符
         safe_filename = Path(filename).name
         file_path = save_dir / safe_filename
+        task_id = self.download_tasks.new_id(safe_filename)
+        
+        # 初始化任务信息
+        self.download_tasks.add(task_id, {
+            'filename': safe_filename,
+            'url': url,
+            'total_size': 0,
+            'downloaded_size': 0,
+            'status': 'downloading',
+            'progress': 0,
+            'speed': 0,
+            'eta': 0
+        })
+        self._notify_task(task_id)
+        
+        async def handle_progress(progress: ProgressAccountant):
+            # 下载管理器每0.5秒调用一次，速度为平滑后的瞬时速度
+            self.download_tasks[task_id].update(progress.snapshot())
+            self._notify_task(task_id)
+            if progress_callback:
+                await progress_callback(task_id, self.download_tasks[task_id])
         
         try:
-            # 开始下载
-            response = requests.get(url, stream=True, timeout=30)
-            response.raise_for_status()
-            
-            # 获取文件总大小
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded_size = 0
-            
-            # 初始化任务信息
-            self.download_tasks[task_id] = {
-                'filename': safe_filename,
-                'url': url,
-                'total_size': total_size,
-                'downloaded_size': 0,
-                'status': 'downloading',
-                'progress': 0,
-                'speed': 0,
-                'eta': 0
-            }
+            # 获取官方hash值，下载过程中边写入边计算，校验通过后才替换文件
+            expected_hash = None
+            if verify_hash:
+                expected_hash = await asyncio.to_thread(self.get_official_hash, safe_filename)
+            
+            # 分段数与最小分段大小沿用核心的jdm配置
+            download_result = await download_manager.download(
+                url, file_path, handle_progress, chunk_size,
+                part_workers=config_manager.get_config('part_workers'),
+                min_split_size=config_manager.get_config('min_split_size'),
+                expected_hash=expected_hash
+            )
             
-            # 记录开始时间
-            start_time = time.time()
-            last_update_time = start_time
-            
-            # 写入文件
-            with open(file_path, 'wb') as file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        file.write(chunk)
-                        downloaded_size += len(chunk)
-                        
-                        # 更新下载信息
-                        current_time = time.time()
-                        elapsed_time = current_time - start_time
-                        
-                        if elapsed_time > 0:
-                            speed = downloaded_size / elapsed_time  # bytes per second
-                            remaining_size = total_size - downloaded_size
-                            eta = remaining_size / speed if speed > 0 else 0
-                        else:
-                            speed = 0
-                            eta = 0
-                        
-                        progress = (downloaded_size / total_size * 100) if total_size > 0 else 0
-                        
-                        # 更新任务状态
-                        self.download_tasks[task_id].update({
-                            'downloaded_size': downloaded_size,
-                            'progress': progress,
-                            'speed': speed,
-                            'eta': eta
-                        })
-                        
-                        # 调用进度回调（每0.5秒更新一次，避免过于频繁）
-                        if (current_time - last_update_time) >= 0.5 and progress_callback:
-                            await progress_callback(task_id, self.download_tasks[task_id])
-                            last_update_time = current_time
-                        
-                        # 允许其他异步任务运行
-                        await asyncio.sleep(0)
+            # 写入hash缓存，下载后首次校验无需重新读取文件
+            self.seed_file_hash(str(file_path), download_result['sha256'])
             
             # 下载完成
-            self.download_tasks[task_id]['status'] = 'completed'
-            self.download_tasks[task_id]['progress'] = 100
+            self.download_tasks.finish(task_id, 'completed', progress=100)
             
+            self._notify_task(task_id)
             if progress_callback:
                 await progress_callback(task_id, self.download_tasks[task_id])
             
@@ -247,13 +248,16 @@ class CoreManager:
                 'success': True,
                 'task_id': task_id,
                 'file_path': str(file_path),
+                'sha256': download_result['sha256'],
+                'hash_verified': expected_hash is not None,
                 'message': f'文件 {filename} 下载完成'
             }
             
-        except requests.exceptions.RequestException as e:
-            self.download_tasks[task_id]['status'] = 'failed'
-            self.download_tasks[task_id]['error'] = str(e)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"下载文件失败: {filename}, 网络错误: {str(e)}")
+            self.download_tasks.finish(task_id, 'failed', error=str(e))
             
+            self._notify_task(task_id)
             if progress_callback:
                 await progress_callback(task_id, self.download_tasks[task_id])
             
@@ -265,9 +269,10 @@ class CoreManager:
             }
         
         except Exception as e:
-            self.download_tasks[task_id]['status'] = 'failed'
-            self.download_tasks[task_id]['error'] = str(e)
+            logger.error(f"下载文件失败: {filename}, 错误: {str(e)}")
+            self.download_tasks.finish(task_id, 'failed', error=str(e))
             
+            self._notify_task(task_id)
             if progress_callback:
                 await progress_callback(task_id, self.download_tasks[task_id])
             
@@ -282,9 +287,9 @@ class CoreManager:
         """获取下载任务信息"""
         return self.download_tasks.get(task_id, {})
     
-    def get_all_tasks(self) -> dict:
-        """获取所有下载任务"""
-        return self.download_tasks.copy()
+    def get_all_tasks(self) -> Mapping[str, Mapping]:
+        """获取所有下载任务的只读视图，任务信息同样只读"""
+        return self.download_tasks.view()
     
     def format_file_size(self, size_bytes: int) -> str:
         """格式化文件大小"""
@@ -316,6 +321,53 @@ class CoreManager:
             minutes = int((seconds % 3600) / 60)
             return f"{hours}时{minutes}分"
     
+    def _prepare_core_start(self, config_file_path: str, resources_path: str) -> Optional[Tuple[Path, Path, str]]:
+        """
+        启动核心前的检查，保证同时只启动一个核心
+        
+        Returns:
+            Optional[Tuple[Path, Path, str]]: (核心文件路径, 配置文件路径, 核心文件名)，不能启动时返回None
+        """
+        # 检查核心是否已经在运行
+        if self.is_running:
+            logger.warning("核心已经在运行中，无法重复启动")
+            return None
+        
+        # 检查进程是否仍然存在（防止状态不同步）
+        if self.core_process and self._poll_core_process() is None:
+            logger.warning("检测到核心进程仍在运行，但状态不同步")
+            self.is_running = True
+            return None
+        
+        # 获取核心文件路径
+        core_filename = self.get_core_filename()
+        core_path = Path(resources_path).resolve() / core_filename
+        
+        if not core_path.exists():
+            logger.error(f"核心文件不存在: {core_path}")
+            return None
+        
+        config_path = Path(config_file_path)
+        if not config_path.exists():
+            logger.error(f"配置文件不存在: {config_path}")
+            return None
+        
+        # 检查是否已经有同名进程在运行（额外的安全措施）
+        # 进程表只在启动时扫描一次，之后由进程监督器跟踪
+        if not process_supervisor.state['scanned']:
+            process_supervisor.scan_external(core_filename)
+        if process_supervisor.has_external_processes():
+            logger.warning(f"检测到已有核心进程在运行: {core_filename}")
+            return None
+        
+        return core_path, config_path, core_filename
+    
+    def _poll_core_process(self) -> Optional[int]:
+        """获取核心进程的退出码，仍在运行时返回None，兼容Popen和asyncio子进程"""
+        if isinstance(self.core_process, subprocess.Popen):
+            return self.core_process.poll()
+        return self.core_process.returncode
+    
     def start_core(self, config_file_path: str, resources_path: str = "./resources") -> bool:
         """
         启动核心程序，保证同时只启动一个核心
@@ -328,34 +380,10 @@ class CoreManager:
             bool: 启动是否成功
         """
         try:
-            # 检查核心是否已经在运行
-            if self.is_running:
-                logger.warning("核心已经在运行中，无法重复启动")
-                return False
-            
-            # 检查进程是否仍然存在（防止状态不同步）
-            if self.core_process and self.core_process.poll() is None:
-                logger.warning("检测到核心进程仍在运行，但状态不同步")
-                self.is_running = True
-                return False
-            
-            # 获取核心文件路径
-            core_filename = self.get_core_filename()
-            core_path = Path(resources_path).resolve() / core_filename
-            
-            if not core_path.exists():
-                logger.error(f"核心文件不存在: {core_path}")
-                return False
-            
-            config_path = Path(config_file_path)
-            if not config_path.exists():
-                logger.error(f"配置文件不存在: {config_path}")
-                return False
-            
-            # 检查是否已经有同名进程在运行（额外的安全措施）
-            if self._is_core_process_running(core_filename):
-                logger.warning(f"检测到已有核心进程在运行: {core_filename}")
+            prepared = self._prepare_core_start(config_file_path, resources_path)
+            if prepared is None:
                 return False
+            core_path, config_path, core_filename = prepared
             
             # 创建子进程运行核心
             self.core_process = subprocess.Popen(
@@ -369,6 +397,15 @@ class CoreManager:
             
             self.is_running = True
             
+            # 日志回调在调用者的事件循环中执行，没有事件循环时在读取线程中执行
+            try:
+                self.log_bridge.attach(asyncio.get_running_loop())
+            except RuntimeError:
+                self.log_bridge.attach(None)
+            
+            # 由进程监督器跟踪进程退出
+            process_supervisor.attach(self.core_process)
+            
             # 启动输出读取线程
             output_thread = threading.Thread(target=self._read_output)
             output_thread.daemon = True
@@ -383,6 +420,55 @@ class CoreManager:
             self.core_process = None
             return False
     
+    async def start_core_async(self, config_file_path: str, resources_path: str = "./resources") -> bool:
+        """
+        以asyncio子进程方式启动核心程序，输出在事件循环中读取，不需要额外的线程
+        
+        事件循环不支持子进程时（如Windows上的SelectorEventLoop）退回到线程方式
+        
+        Args:
+            config_file_path: 配置文件路径
+            resources_path: 核心文件所在目录
+            
+        Returns:
+            bool: 启动是否成功
+        """
+        try:
+            prepared = self._prepare_core_start(config_file_path, resources_path)
+            if prepared is None:
+                return False
+            core_path, config_path, core_filename = prepared
+            
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    str(core_path), '', str(config_path),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT
+                )
+            except NotImplementedError:
+                logger.warning("当前事件循环不支持子进程，使用线程方式启动核心")
+                return self.start_core(config_file_path, resources_path)
+            
+            self.core_process = process
+            self._core_loop = asyncio.get_running_loop()
+            self.is_running = True
+            
+            # 输出在事件循环中读取，日志回调直接在事件循环中分发
+            self.log_bridge.attach(None)
+            
+            # 由读取任务等待进程退出并通知进程监督器
+            process_supervisor.attach_pid(process.pid)
+            self._output_task = asyncio.create_task(self._read_output_async(process))
+            
+            logger.success(f"核心启动成功: {core_filename}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"启动核心失败: {str(e)}")
+            self.is_running = False
+            self.core_process = None
+            return False
+    
     def stop_core(self) -> bool:
         """
         停止核心程序，确保完全停止
@@ -401,6 +487,10 @@ class CoreManager:
                 logger.warning("检测到状态不同步，强制更新状态")
                 self.is_running = True
             
+            # asyncio子进程只能在所属的事件循环中等待退出
+            if self.core_process and not isinstance(self.core_process, subprocess.Popen):
+                return self._stop_async_process()
+            
             # 尝试优雅终止
             if self.core_process:
                 try:
@@ -440,31 +530,211 @@ class CoreManager:
             self.core_process = None
             return False
     
+    def _stop_async_process(self, timeout: float = 10) -> bool:
+        """
+        在同步代码中停止asyncio子进程
+        
+        所属的事件循环在其他线程中运行时，把stop_core_async交给该循环执行并等待结果；
+        事件循环已经停止，或者就在当前线程中无法同步等待时，直接按PID终止进程
+        
+        Args:
+            timeout: 等待进程退出的秒数
+            
+        Returns:
+            bool: 停止是否成功
+        """
+        loop = self._core_loop
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+        
+        if loop is not None and loop.is_running() and loop is not current_loop:
+            future = asyncio.run_coroutine_threadsafe(self.stop_core_async(timeout), loop)
+            try:
+                # stop_core_async强制终止和等待剩余输出最多还需要10秒
+                return future.result(timeout + 10)
+            except Exception as e:
+                logger.error(f"等待事件循环停止核心失败: {str(e)}")
+                future.cancel()
+        
+        process = self.core_process
+        if not self._terminate_pid(process.pid, timeout):
+            return False
+        
+        if self._output_task and not self._output_task.done() and loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._output_task.cancel)
+        # 读取任务不会再运行，由这里通知进程监督器
+        process_supervisor.mark_exited(process.pid, process.returncode)
+        
+        self.is_running = False
+        self.core_process = None
+        self._output_task = None
+        self.clear_log_callbacks()
+        
+        logger.info("核心已停止")
+        return True
+    
+    def _terminate_pid(self, pid: int, timeout: float = 10) -> bool:
+        """
+        按PID终止进程，超过timeout秒仍未退出时强制终止
+        
+        Returns:
+            bool: 进程是否已经退出
+        """
+        try:
+            import psutil
+            
+            try:
+                proc = psutil.Process(pid)
+                proc.terminate()
+                try:
+                    proc.wait(timeout)
+                except psutil.TimeoutExpired:
+                    logger.warning("进程未正常终止，尝试强制终止")
+                    proc.kill()
+                    proc.wait(5)
+            except psutil.NoSuchProcess:
+                # 进程已经退出
+                pass
+            return True
+            
+        except ImportError:
+            # 如果psutil不可用，只能发送终止信号
+            logger.warning("psutil模块不可用，直接发送终止信号")
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            except Exception as e:
+                logger.error(f"终止进程失败: {str(e)}")
+                return False
+            return True
+            
+        except Exception as e:
+            logger.error(f"终止进程失败: {str(e)}")
+            return False
+    
+    async def stop_core_async(self, timeout: float = 10) -> bool:
+        """
+        停止核心程序，等待进程退出时不阻塞事件循环
+        
+        先请求进程终止，超过timeout秒仍未退出时强制终止
+        
+        Args:
+            timeout: 等待进程正常退出的秒数
+            
+        Returns:
+            bool: 停止是否成功
+        """
+        process = self.core_process
+        if isinstance(process, subprocess.Popen):
+            # 线程方式启动的核心，在线程中等待退出
+            return await asyncio.to_thread(self.stop_core)
+        
+        try:
+            # 检查是否有正在运行的核心进程
+            if not self.is_running and not process:
+                logger.warning("没有正在运行的核心进程")
+                return False
+            
+            if process and process.returncode is None:
+                try:
+                    process.terminate()
+                    try:
+                        await asyncio.wait_for(process.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        # 如果进程仍未终止，强制终止
+                        logger.warning("进程未正常终止，尝试强制终止")
+                        process.kill()
+                        await asyncio.wait_for(process.wait(), 5)
+                except ProcessLookupError:
+                    # 进程已经退出
+                    pass
+            
+            # 等待读取任务处理完剩余输出
+            if self._output_task and not self._output_task.done():
+                try:
+                    await asyncio.wait_for(self._output_task, 5)
+                except asyncio.TimeoutError:
+                    self._output_task.cancel()
+            
+            # 清理状态
+            self.is_running = False
+            self.core_process = None
+            self._output_task = None
+            
+            # 清除所有日志回调
+            self.clear_log_callbacks()
+            
+            logger.info("核心已停止")
+            return True
+            
+        except Exception as e:
+            logger.error(f"停止核心失败: {str(e)}")
+            # 尽量强制终止进程
+            try:
+                if process and process.returncode is None:
+                    process.kill()
+            except Exception:
+                pass
+            self.is_running = False
+            self.core_process = None
+            return False
+    
+    async def _read_output_async(self, process: asyncio.subprocess.Process) -> None:
+        """
+        在事件循环中读取asyncio子进程的输出，进程退出后通知进程监督器
+        
+        已经在事件循环中，不经过日志桥，每次读取到的所有行作为一批直接分发
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        buffer = ''
+        try:
+            while True:
+                chunk = await process.stdout.read(64 * 1024)
+                if not chunk:
+                    break
+                buffer += decoder.decode(chunk)
+                
+                # 结尾的\r可能和下一块开头的\n组成一个换行符，留到下一次处理
+                pending_cr = buffer.endswith('\r')
+                if pending_cr:
+                    buffer = buffer[:-1]
+                lines = NEWLINE_PATTERN.split(buffer)
+                buffer = lines.pop() + ('\r' if pending_cr else '')
+                
+                if lines:
+                    now = time.time()
+                    self._dispatch_logs([parse_record(line, now) for line in lines])
+            
+            buffer += decoder.decode(b'', final=True)
+            now = time.time()
+            records = [parse_record(line, now) for line in NEWLINE_PATTERN.split(buffer) if line]
+            if records:
+                self._dispatch_logs(records)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"读取核心输出失败: {str(e)}")
+        finally:
+            try:
+                return_code = await process.wait()
+            except asyncio.CancelledError:
+                return_code = process.returncode
+            process_supervisor.mark_exited(process.pid, return_code)
+            if self.core_process is process:
+                self.is_running = False
+    
     def _read_output(self):
         """读取核心程序输出"""
         try:
             while self.is_running and self.core_process:
                 line = self.core_process.stdout.readline()
                 if line:
-                    # 过滤ANSI转义序列（控制台颜色代码）
-                    clean_line = self._filter_ansi_escape(line)
-                    
-                    # 识别日志等级
-                    log_level = self._get_log_level(clean_line)
-                    
-                    # 调用所有日志回调函数，传递日志文本和等级
-                    for callback in self.log_callbacks:
-                        try:
-                            # 使用异步方式执行UI更新，避免slot错误
-                            if hasattr(callback, '__self__') and hasattr(callback.__self__, 'ui'):
-                                # 如果是UI组件的方法，使用异步执行
-                                import asyncio
-                                asyncio.create_task(self._safe_callback(callback, clean_line, log_level))
-                            else:
-                                # 直接调用非UI回调
-                                callback(clean_line, log_level)
-                        except Exception as e:
-                            logger.error(f"日志回调执行失败: {str(e)}")
+                    # 过滤ANSI转义序列（控制台颜色代码）并解析为结构化记录
+                    # 交给日志桥，由事件循环批量分发
+                    self.log_bridge.put(parse_record(line, time.time()))
                 else:
                     break
         except Exception as e:
@@ -482,21 +752,7 @@ class CoreManager:
         Returns:
             str: 过滤后的干净文本
         """
-        import re
-        # 匹配常见的ANSI转义序列
-        ansi_escape_patterns = [
-            r'\x1b\[[0-9;]*m',  # 颜色代码
-            r'\x1b\[[0-9;]*[A-HJ-ST]',  # 光标移动等控制代码
-            r'\x1b\[[0-9;]*[f]',  # 光标定位
-            r'\x1b\[[0-9;]*[K]',  # 清除行
-        ]
-        
-        clean_text = text
-        for pattern in ansi_escape_patterns:
-            ansi_escape = re.compile(pattern)
-            clean_text = ansi_escape.sub('', clean_text)
-        
-        return clean_text.strip()
+        return strip_ansi(text)
     
     def _is_core_process_running(self, core_filename: str) -> bool:
         """
@@ -603,6 +859,8 @@ class CoreManager:
             
             if killed_count > 0:
                 logger.success(f"成功终止 {killed_count} 个核心进程")
+                # 重新扫描，同步进程监督器中的外部进程列表
+                process_supervisor.scan_external(core_filename)
                 return True
             else:
                 logger.info("未找到需要终止的核心进程")
@@ -663,37 +921,22 @@ class CoreManager:
         Returns:
             str: 日志等级对应的CSS类名
         """
-        import re
-        
-        # 检查日志中是否包含等级标识
-        log_levels = ['ERROR', 'WARNING', 'INFO', 'DEBUG', 'SUCCESS', 'FATA']
-        for level in log_levels:
-            # 使用正则表达式匹配日志等级（如 [ERROR], [WARNING] 等）
-            pattern = r'\[(' + re.escape(level) + r')\]'
-            if re.search(pattern, text, re.IGNORECASE):
-                return level.lower()
-        
-        # 如果没有匹配到特定等级，检查常见的关键词
-        text_lower = text.lower()
-        if any(keyword in text_lower for keyword in ['error', 'failed', 'failure', 'exception', 'fatal']):
-            return 'error'
-        elif any(keyword in text_lower for keyword in ['warning', 'warn', 'caution']):
-            return 'warning'
-        elif any(keyword in text_lower for keyword in ['success', 'completed', 'finished', 'done', 'ready']):
-            return 'success'
-        elif any(keyword in text_lower for keyword in ['debug', 'trace']):
-            return 'debug'
-        
-        # 默认使用info等级
-        return 'info'
-    
-    async def _safe_callback(self, callback, line, log_level):
-        """安全执行UI回调函数"""
-        try:
-            # 使用异步方式执行UI更新
-            await callback(line, log_level)
-        except Exception as e:
-            logger.error(f"异步日志回调执行失败: {str(e)}")
+        return classify_level(text)
+    
+    def _dispatch_logs(self, records):
+        """在事件循环中保存一批日志记录，并分发给所有日志回调"""
+        for record in records:
+            self.log_records.append(record)
+            # 无论日志页面是否打开都保存到持久化存储（保存原始文本）
+            log_manager.save_log(record.raw.strip())
+            for callback in list(self.log_callbacks):
+                try:
+                    result = callback(record.raw, record.level)
+                    # 异步回调作为任务在事件循环中执行
+                    if asyncio.iscoroutine(result):
+                        asyncio.ensure_future(result)
+                except Exception as e:
+                    logger.error(f"日志回调执行失败: {str(e)}")
     
     def add_log_callback(self, callback: Callable[[str], None]):
         """
@@ -714,22 +957,48 @@ class CoreManager:
         if callback in self.log_callbacks:
             self.log_callbacks.remove(callback)
     
+    def add_task_listener(self, listener: Callable[[str, dict], None]):
+        """
+        添加下载任务监听函数，任务开始、进度更新和结束时在事件循环中调用
+        
+        Args:
+            listener: 监听函数，接收(任务ID, 任务信息)
+        """
+        if listener not in self.task_listeners:
+            self.task_listeners.append(listener)
+    
+    def remove_task_listener(self, listener: Callable[[str, dict], None]):
+        """移除下载任务监听函数"""
+        if listener in self.task_listeners:
+            self.task_listeners.remove(listener)
+    
+    def _notify_task(self, task_id: str):
+        """把下载任务的状态变化通知所有监听函数"""
+        info = self.download_tasks.get(task_id)
+        if info is None:
+            return
+        for listener in list(self.task_listeners):
+            try:
+                listener(task_id, info)
+            except Exception as e:
+                logger.error(f"下载任务监听函数执行失败: {str(e)}")
+    
     def clear_log_callbacks(self):
         """清除所有日志回调函数"""
         self.log_callbacks.clear()
     
     def get_core_status(self) -> dict:
         """
-        获取核心状态信息，包括详细的进程检查
+        获取核心状态信息，进程状态由进程监督器推送维护，不扫描系统进程表
         
         Returns:
             dict: 核心状态信息
         """
         # 检查进程状态
-        process_status = "unknown"
+        process_status = process_supervisor.get_process_status()
         if self.core_process:
             try:
-                return_code = self.core_process.poll()
+                return_code = self._poll_core_process()
                 if return_code is None:
                     process_status = "running"
                 else:
@@ -737,16 +1006,12 @@ class CoreManager:
             except:
                 process_status = "error_checking"
         
-        # 检查是否有同名进程在运行
+        # 启动时扫描到的同名进程
         core_filename = self.get_core_filename()
-        other_processes_running = False
-        try:
-            other_processes_running = self._is_core_process_running(core_filename)
-        except:
-            pass
+        other_processes_running = process_supervisor.has_external_processes()
         
         return {
-            'is_running': self.is_running,
+            'is_running': process_supervisor.is_running(),
             'process_exists': self.core_process is not None,
             'process_status': process_status,
             'other_processes_running': other_processes_running,
@@ -1,15 +1,18 @@
 """
 核心状态管理模块
-负责管理核心运行状态和全局缓存变量
+负责管理核心运行状态和全局缓存变量，并作为状态总线把状态变化推送给所有页面
 """
 
+import asyncio
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Optional
 from loguru import logger
-from core_manager import CoreManager
+from core_manager import core_manager
+from process_supervisor import process_supervisor
 
-# 创建全局实例
-core_manager = CoreManager()
+# 状态总线的订阅者和所在的事件循环
+_subscribers: List[Callable[[Dict[str, Any]], Any]] = []
+_loop: Optional[asyncio.AbstractEventLoop] = None
 
 
 # 创建全局缓存变量
@@ -39,7 +42,11 @@ def update_core_status() -> bool:
     try:
         # 获取核心管理器状态
         core_status = core_manager.get_core_status()
-        old_status = core['status']['is_running']
+        old_status = (
+            core['status']['is_running'],
+            core['status']['process_status'],
+            core['status']['other_processes_running']
+        )
         # 获取核心文件信息
         core_info = core_manager.get_core_info()
         
@@ -58,8 +65,14 @@ def update_core_status() -> bool:
             'log_callbacks_count': core_status.get('log_callbacks_count', 0),
             'last_update': time.time()
         })
-        if old_status != core['status']['is_running']:
+        new_status = (
+            core['status']['is_running'],
+            core['status']['process_status'],
+            core['status']['other_processes_running']
+        )
+        if old_status != new_status:
             logger.debug(f"核心状态已更新: {core['status']}")
+            _publish()
         return True
         
     except Exception as e:
@@ -98,4 +111,66 @@ def get_core_info() -> Dict[str, Any]:
         'exist': core['exist'],
         'filename': core['filename'],
         'path': core['path']
-    }
\ No newline at end of file
+    }
+
+
+def subscribe(callback: Callable[[Dict[str, Any]], Any]) -> None:
+    """
+    订阅核心状态变化，回调在事件循环中执行
+    
+    Args:
+        callback: 回调函数，接收核心状态字典
+    """
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+
+
+def unsubscribe(callback: Callable[[Dict[str, Any]], Any]) -> None:
+    """
+    取消订阅核心状态变化
+    
+    Args:
+        callback: 要移除的回调函数
+    """
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+
+
+def _dispatch(status: Dict[str, Any]) -> None:
+    """把状态变化分发给所有订阅者"""
+    for callback in list(_subscribers):
+        try:
+            callback(status)
+        except Exception as e:
+            logger.error(f"核心状态回调执行失败: {str(e)}")
+
+
+def _publish() -> None:
+    """发布状态变化，不在事件循环线程中时转交给事件循环执行"""
+    status = core['status'].copy()
+    
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+    
+    if _loop is None or running_loop is _loop:
+        _dispatch(status)
+    elif not _loop.is_closed():
+        _loop.call_soon_threadsafe(_dispatch, status)
+
+
+def _on_process_state_changed(state: Dict[str, Any]) -> None:
+    """进程监督器推送状态变化时立即刷新缓存"""
+    update_core_status()
+
+
+def initialize() -> None:
+    """初始化状态总线，需要在事件循环中调用"""
+    global _loop
+    _loop = asyncio.get_running_loop()
+    update_core_status()
+
+
+# 订阅核心进程状态变化
+process_supervisor.subscribe(_on_process_state_changed)
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+核心文件校验模块
+负责在后台校验核心文件的hash值，页面直接读取校验状态而不必等待网络和文件读取
+"""
+
+import asyncio
+import time
+from typing import Dict, Any, Callable, List, Optional
+from loguru import logger
+
+from core_manager import core_manager
+from hash_manifest import hash_manifest
+
+
+class CoreVerifier:
+    """核心文件后台校验器"""
+
+    # 定期重新校验的间隔（秒），文件和清单都有缓存，重新校验的开销很小
+    REVERIFY_INTERVAL = 600
+
+    def __init__(self):
+        self.state: Dict[str, Any] = {
+            'status': 'pending',  # pending / checking / done
+            'result': None,
+            'last_update': None
+        }
+        self._subscribers: List[Callable[[Dict[str, Any]], Any]] = []
+        self._trigger: Optional[asyncio.Event] = None
+        self._force_refresh = False
+        self._verify_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """启动后台校验任务，需要在事件循环中调用"""
+        if self._task and not self._task.done():
+            return
+        self._trigger = asyncio.Event()
+        self._verify_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        logger.info("核心文件后台校验已启动")
+
+    async def stop(self) -> None:
+        """停止后台校验任务"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        """后台循环：启动时校验一次，之后等待触发或定期重新校验"""
+        while True:
+            force_refresh = self._force_refresh
+            self._force_refresh = False
+            self._trigger.clear()
+
+            await self.verify(force_refresh)
+
+            try:
+                await asyncio.wait_for(self._trigger.wait(), timeout=self.REVERIFY_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def request_verify(self, force_refresh: bool = False) -> None:
+        """
+        请求后台重新校验
+
+        Args:
+            force_refresh: 是否忽略有效期重新获取官方hash清单
+        """
+        self._force_refresh = self._force_refresh or force_refresh
+        if self._trigger:
+            self._trigger.set()
+
+    async def verify(self, force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        立即校验核心文件并通知订阅者
+
+        Args:
+            force_refresh: 是否忽略有效期重新获取官方hash清单
+
+        Returns:
+            校验结果字典，格式与CoreManager.check_core_hash()相同
+        """
+        if self._verify_lock is None:
+            self._verify_lock = asyncio.Lock()
+
+        async with self._verify_lock:
+            self._update_state('checking')
+            try:
+                if force_refresh:
+                    await asyncio.to_thread(hash_manifest.get_entries, True)
+                result = await asyncio.to_thread(core_manager.check_core_hash)
+            except Exception as e:
+                logger.error(f"后台校验核心文件失败: {str(e)}")
+                result = {
+                    'valid': False,
+                    'exists': False,
+                    'message': f'校验失败: {str(e)}'
+                }
+            self._update_state('done', result)
+            return result
+
+    def _update_state(self, status: str, result: Optional[Dict[str, Any]] = None) -> None:
+        """更新校验状态并通知订阅者"""
+        self.state['status'] = status
+        if result is not None:
+            self.state['result'] = result
+        self.state['last_update'] = time.time()
+
+        for callback in list(self._subscribers):
+            try:
+                callback(self.get_state())
+            except Exception as e:
+                logger.error(f"校验状态回调执行失败: {str(e)}")
+
+    def get_state(self) -> Dict[str, Any]:
+        """获取当前校验状态"""
+        return self.state.copy()
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], Any]) -> None:
+        """
+        订阅校验状态变化
+
+        Args:
+            callback: 回调函数，接收校验状态字典
+        """
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Dict[str, Any]], Any]) -> None:
+        """取消订阅校验状态变化"""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+
+# 创建全局核心校验器实例
+core_verifier = CoreVerifier()
@@ -0,0 +1,715 @@
+"""
+下载管理器模块
+基于aiohttp实现非阻塞的文件下载
+"""
+
+import asyncio
+import bisect
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Callable, Awaitable, List, Tuple, Dict, Any
+
+import aiohttp
+from loguru import logger
+
+
+class DownloadError(Exception):
+    """下载过程中出现的错误"""
+
+
+class RangeNotSupportedError(DownloadError):
+    """服务器不支持按字节范围下载，或文件在续传期间发生了变化"""
+
+
+class HashMismatchError(DownloadError):
+    """下载完成的文件与期望的SHA256不一致"""
+
+
+class StreamingHasher:
+    """
+    边下载边计算SHA256
+
+    按文件偏移顺序接收数据，只有紧接在已计算位置之后的数据块会被直接计算，
+    分段下载中乱序到达的数据在前面的范围完成后从磁盘补算
+    """
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self.position = 0
+
+    def update(self, offset: int, data: bytes) -> None:
+        """计算一块数据，不连续的数据块会被忽略"""
+        if offset == self.position:
+            self._hash.update(data)
+            self.position += len(data)
+
+    def catch_up(self, file, end: int, block_size: int = 1024 * 1024) -> None:
+        """
+        从已打开的文件中读取并计算到指定偏移
+
+        Args:
+            file: 以二进制方式打开的文件对象
+            end: 计算到的偏移（不包含）
+            block_size: 每次读取的字节数
+        """
+        file.seek(self.position)
+        while self.position < end:
+            data = file.read(min(block_size, end - self.position))
+            if not data:
+                break
+            self._hash.update(data)
+            self.position += len(data)
+
+    def hexdigest(self) -> str:
+        """获取十六进制的哈希值"""
+        return self._hash.hexdigest()
+
+
+class DownloadJournal:
+    """
+    下载检查点日志
+
+    与.part文件放在一起，记录每个分段已经写入磁盘的范围以及服务器返回的
+    ETag/Last-Modified，重试时据此发送Range/If-Range请求继续下载
+    """
+
+    def __init__(self, journal_path: Path):
+        self.journal_path = journal_path
+        self.url = ''
+        self.total_size = 0
+        self.etag = ''
+        self.last_modified = ''
+        # 每个分段为[起始偏移, 结束偏移, 下一个待写入偏移]，[起始偏移, 下一个待写入偏移)即已完成的范围
+        self.segments: List[List[int]] = []
+        self._starts: List[int] = []
+
+    @classmethod
+    def create(cls, journal_path: Path, url: str, total_size: int, etag: str,
+               last_modified: str, segments: List[Tuple[int, int]]) -> 'DownloadJournal':
+        """创建新的检查点日志"""
+        journal = cls(journal_path)
+        journal.url = url
+        journal.total_size = total_size
+        journal.etag = etag
+        journal.last_modified = last_modified
+        journal.segments = [[start, end, start] for start, end in segments]
+        journal._starts = [start for start, _ in segments]
+        return journal
+
+    @classmethod
+    def load(cls, journal_path: Path) -> Optional['DownloadJournal']:
+        """从文件加载检查点日志，文件不存在或已损坏时返回None"""
+        try:
+            if not journal_path.exists():
+                return None
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            journal = cls(journal_path)
+            journal.url = data['url']
+            journal.total_size = int(data['total_size'])
+            journal.etag = data.get('etag', '')
+            journal.last_modified = data.get('last_modified', '')
+            journal.segments = [[int(start), int(end), int(next_offset)]
+                                for start, end, next_offset in data['segments']]
+            journal._starts = [segment[0] for segment in journal.segments]
+            return journal
+        except Exception as e:
+            logger.warning(f"读取下载检查点失败，将重新下载: {str(e)}")
+            return None
+
+    def save(self) -> None:
+        """把检查点日志原子地写入磁盘"""
+        temp_path = self.journal_path.with_name(self.journal_path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'url': self.url,
+                'total_size': self.total_size,
+                'etag': self.etag,
+                'last_modified': self.last_modified,
+                'segments': self.segments
+            }, f)
+        os.replace(temp_path, self.journal_path)
+
+    def discard(self) -> None:
+        """删除检查点日志"""
+        self.journal_path.unlink(missing_ok=True)
+
+    def matches(self, url: str, total_size: int, etag: str, last_modified: str) -> bool:
+        """检查日志是否对应同一个远程文件"""
+        if self.url != url or self.total_size != total_size:
+            return False
+        if etag and self.etag and etag != self.etag:
+            return False
+        if last_modified and self.last_modified and last_modified != self.last_modified:
+            return False
+        return True
+
+    def mark_written(self, offset: int, length: int) -> None:
+        """记录一块数据已经写入磁盘"""
+        index = bisect.bisect_right(self._starts, offset) - 1
+        segment = self.segments[index]
+        if offset == segment[2]:
+            segment[2] = offset + length
+
+    @property
+    def contiguous_size(self) -> int:
+        """从文件开头起连续完成的字节数"""
+        for start, end, next_offset in self.segments:
+            if next_offset < end:
+                return next_offset
+        return self.total_size
+
+    @property
+    def completed_size(self) -> int:
+        """已完成的字节数"""
+        return sum(next_offset - start for start, _, next_offset in self.segments)
+
+    @property
+    def if_range(self) -> str:
+        """If-Range请求头的值，弱ETag不能用于If-Range"""
+        if self.etag and not self.etag.startswith('W/'):
+            return self.etag
+        return self.last_modified
+
+
+class FileWriter:
+    """
+    异步文件写入器
+
+    通过有界队列把磁盘写入转移到工作线程中执行，队列满时写入方会等待，
+    从而让网络读取速度自动适配磁盘写入速度（背压）
+    """
+
+    def __init__(self, file_path: Path, max_pending: int = 16,
+                 journal: Optional[DownloadJournal] = None, checkpoint_interval: float = 1.0,
+                 hasher: Optional[StreamingHasher] = None):
+        self.file_path = file_path
+        self.journal = journal
+        self.hasher = hasher
+        self.checkpoint_interval = checkpoint_interval
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self._file = None
+        self._task = None
+        # 保证写入、检查点和关闭操作在工作线程之间串行执行
+        self._lock = threading.Lock()
+        self._last_checkpoint = time.monotonic()
+
+    async def open(self, mode: str = 'wb') -> None:
+        """打开文件并启动写入任务"""
+        self._file = await asyncio.to_thread(open, self.file_path, mode)
+        self._task = asyncio.create_task(self._run())
+
+    async def write(self, offset: int, data: bytes) -> None:
+        """
+        提交一块数据，写入到文件的指定偏移处
+
+        Args:
+            offset: 写入偏移
+            data: 数据块
+        """
+        await self._put((offset, data))
+
+    def _raise_stopped(self) -> None:
+        """写入任务已经退出，抛出其异常"""
+        self._task.result()
+        raise DownloadError('文件写入任务已停止')
+
+    async def _put(self, item) -> None:
+        """放入队列，队列已满时同时等待写入任务，写入任务出错退出时不会一直阻塞"""
+        if self._task.done():
+            self._raise_stopped()
+        try:
+            self._queue.put_nowait(item)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        put = asyncio.ensure_future(self._queue.put(item))
+        try:
+            await asyncio.wait({put, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not put.done():
+                put.cancel()
+        if not put.done() or put.cancelled():
+            self._raise_stopped()
+
+    async def _run(self) -> None:
+        """写入任务，按提交顺序把数据块写入文件"""
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                break
+            offset, data = item
+            await asyncio.to_thread(self._write_at, offset, data)
+
+    def _write_at(self, offset: int, data: bytes) -> None:
+        """在工作线程中写入数据，同时计算哈希，并按时间间隔保存检查点"""
+        with self._lock:
+            if self._file.tell() != offset:
+                self._file.seek(offset)
+            self._file.write(data)
+
+            if self.hasher:
+                self.hasher.update(offset, data)
+
+            if self.journal:
+                self.journal.mark_written(offset, len(data))
+                # 前面的范围已经完成时，从磁盘补算后续范围中已写入的数据
+                if self.hasher and self.journal.contiguous_size > self.hasher.position:
+                    self._file.flush()
+                    self.hasher.catch_up(self._file, self.journal.contiguous_size)
+                if time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+                    self._checkpoint()
+
+    def _checkpoint(self) -> None:
+        """先把数据刷入磁盘再保存检查点，保证日志不会记录尚未落盘的数据"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.journal.save()
+        self._last_checkpoint = time.monotonic()
+
+    def _close_file(self, checkpoint: bool) -> None:
+        """在工作线程中关闭文件"""
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                if checkpoint and self.journal:
+                    self._checkpoint()
+            finally:
+                self._file.close()
+                self._file = None
+
+    async def close(self) -> None:
+        """等待剩余数据写完并关闭文件"""
+        try:
+            if self._task and not self._task.done():
+                await self._put(None)
+            if self._task:
+                await self._task
+        finally:
+            await asyncio.to_thread(self._close_file, False)
+
+    async def abort(self) -> None:
+        """放弃剩余数据，保存检查点后关闭文件"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        try:
+            await asyncio.to_thread(self._close_file, True)
+        except Exception as e:
+            logger.error(f"保存下载检查点失败: {str(e)}")
+
+
+class ProgressAccountant:
+    """
+    下载进度记账器
+
+    读取循环中每块数据只做一次整数加法，累计超过yield_bytes字节或yield_interval秒后才让出事件循环；
+    下载速度由独立的定时任务每tick_interval秒按两次tick之间的字节增量做指数平滑，
+    进度处理函数也只在tick时调用，与数据块的大小和数量无关
+    """
+
+    def __init__(self, handler: Optional[Callable[['ProgressAccountant'], Awaitable[None]]] = None,
+                 tick_interval: float = 0.5, half_life: float = 2.0,
+                 yield_bytes: int = 1024 * 1024, yield_interval: float = 0.05):
+        """
+        Args:
+            handler: 进度处理函数，参数为记账器本身
+            tick_interval: 计算速度并调用进度处理函数的间隔（秒）
+            half_life: 速度平滑的半衰期（秒），越小越接近瞬时速度
+            yield_bytes: 累计读取多少字节后让出事件循环
+            yield_interval: 距上次让出多少秒后让出事件循环
+        """
+        self.handler = handler
+        self.tick_interval = tick_interval
+        self.half_life = half_life
+        self.yield_bytes = yield_bytes
+        self.yield_interval = yield_interval
+        self.total_size = 0
+        self.downloaded = 0
+        self.speed = 0.0
+        self.eta = 0.0
+        self._tick_time = time.monotonic()
+        self._tick_bytes = 0
+        self._unyielded = 0
+        self._yield_deadline = self._tick_time + yield_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def reset(self, total_size: int, downloaded: int = 0) -> None:
+        """
+        开始新的一次传输，已下载的字节不计入速度
+
+        Args:
+            total_size: 总字节数，未知时为0
+            downloaded: 已完成的字节数（断点续传）
+        """
+        self.total_size = total_size
+        self.downloaded = downloaded
+        self.speed = 0.0
+        self.eta = 0.0
+        self._tick_time = time.monotonic()
+        self._tick_bytes = downloaded
+
+    def add(self, size: int) -> bool:
+        """
+        记录读取到的字节数
+
+        Returns:
+            bool: 是否应该调用yield_to_loop让出事件循环
+        """
+        self.downloaded += size
+        self._unyielded += size
+        return self._unyielded >= self.yield_bytes or time.monotonic() >= self._yield_deadline
+
+    async def yield_to_loop(self) -> None:
+        """让出事件循环，让其他任务和进度定时器有机会运行"""
+        self._unyielded = 0
+        self._yield_deadline = time.monotonic() + self.yield_interval
+        await asyncio.sleep(0)
+
+    def tick(self, now: Optional[float] = None) -> None:
+        """按距上次tick的字节增量更新平滑速度和剩余时间"""
+        now = now if now is not None else time.monotonic()
+        elapsed = now - self._tick_time
+        if elapsed <= 0:
+            return
+        sample = (self.downloaded - self._tick_bytes) / elapsed
+        if self.speed == 0:
+            self.speed = sample
+        else:
+            self.speed += (1 - 0.5 ** (elapsed / self.half_life)) * (sample - self.speed)
+        self._tick_time = now
+        self._tick_bytes = self.downloaded
+
+        remaining = self.total_size - self.downloaded
+        self.eta = remaining / self.speed if self.speed > 0 and remaining > 0 else 0.0
+
+    @property
+    def progress(self) -> float:
+        """下载进度百分比"""
+        return self.downloaded / self.total_size * 100 if self.total_size > 0 else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取当前进度，字段与下载任务信息一致"""
+        return {
+            'total_size': self.total_size,
+            'downloaded_size': self.downloaded,
+            'progress': self.progress,
+            'speed': self.speed,
+            'eta': self.eta
+        }
+
+    async def report(self) -> None:
+        """立即调用进度处理函数"""
+        if self.handler:
+            await self.handler(self)
+
+    def start(self) -> None:
+        """启动定时tick任务，需要在事件循环中调用"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止定时tick任务"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        """定时计算速度并调用进度处理函数"""
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            self.tick()
+            try:
+                await self.report()
+            except Exception as e:
+                logger.error(f"下载进度处理失败: {str(e)}")
+
+
+class DownloadManager:
+    """异步下载管理器，所有下载共享同一个ClientSession"""
+
+    DEFAULT_CHUNK_SIZE = 64 * 1024
+    DEFAULT_MAX_PENDING_WRITES = 16
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_pending_writes: int = DEFAULT_MAX_PENDING_WRITES):
+        self.chunk_size = chunk_size
+        self.max_pending_writes = max_pending_writes
+        self.timeout = aiohttp.ClientTimeout(total=None, connect=30, sock_read=30)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """获取共享的ClientSession，不存在或已关闭时重新创建"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+        return self._session
+
+    async def close(self) -> None:
+        """关闭共享的ClientSession"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def probe(self, url: str) -> Dict[str, Any]:
+        """
+        探测下载链接的文件大小以及是否支持分段下载
+
+        Args:
+            url: 下载链接
+
+        Returns:
+            探测结果字典
+        """
+        session = await self.get_session()
+        async with session.head(url, allow_redirects=True) as response:
+            response.raise_for_status()
+            return {
+                'url': str(response.url),
+                'total_size': response.content_length or 0,
+                'accept_ranges': response.headers.get('Accept-Ranges', '').lower() == 'bytes',
+                'etag': response.headers.get('ETag', ''),
+                'last_modified': response.headers.get('Last-Modified', '')
+            }
+
+    @staticmethod
+    def plan_segments(total_size: int, part_workers: int, min_split_size: int) -> List[Tuple[int, int]]:
+        """
+        把文件划分为若干字节范围
+
+        Args:
+            total_size: 文件总大小
+            part_workers: 最大分段数
+            min_split_size: 每个分段的最小大小
+
+        Returns:
+            分段列表，每项为(起始偏移, 结束偏移)，结束偏移不包含在内
+        """
+        count = max(1, min(part_workers, total_size // max(1, min_split_size)))
+        segment_size = -(-total_size // count)
+        return [(start, min(start + segment_size, total_size))
+                for start in range(0, total_size, segment_size)]
+
+    @staticmethod
+    def get_part_path(file_path: Path) -> Path:
+        """获取下载过程中使用的.part文件路径"""
+        return file_path.with_name(file_path.name + '.part')
+
+    @staticmethod
+    def get_journal_path(file_path: Path) -> Path:
+        """获取.part文件对应的检查点日志路径"""
+        return file_path.with_name(file_path.name + '.part.json')
+
+    async def download(self, url: str, file_path: Path,
+                       progress_handler: Optional[Callable[[ProgressAccountant], Awaitable[None]]] = None,
+                       chunk_size: Optional[int] = None,
+                       part_workers: int = 1,
+                       min_split_size: int = 1048576,
+                       expected_hash: Optional[str] = None) -> Dict[str, Any]:
+        """
+        下载文件，服务器支持时使用多连接分段下载并支持断点续传
+
+        数据先写入.part文件，下载过程中同时计算SHA256，
+        完整下载并校验通过后才重命名为目标文件
+
+        Args:
+            url: 下载链接
+            file_path: 保存路径
+            progress_handler: 进度处理函数，参数为ProgressAccountant，开始、结束时和下载过程中每0.5秒调用一次
+            chunk_size: 每次读取的字节数，为None时使用默认值
+            part_workers: 最大并发分段数
+            min_split_size: 每个分段的最小大小
+            expected_hash: 期望的SHA256，为None时不校验
+
+        Returns:
+            下载结果字典，包含已下载字节数和SHA256
+        """
+        chunk_size = chunk_size or self.chunk_size
+        part_path = self.get_part_path(file_path)
+        journal_path = self.get_journal_path(file_path)
+
+        try:
+            probe = await self.probe(url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"下载链接探测失败，使用单连接下载: {str(e)}")
+            probe = None
+
+        downloaded_size = None
+        hasher = StreamingHasher()
+        progress = ProgressAccountant(progress_handler)
+        progress.start()
+        try:
+            if probe and probe['accept_ranges'] and probe['total_size'] > 0:
+                journal = await asyncio.to_thread(self._load_journal, journal_path, part_path, probe)
+                if journal:
+                    logger.info(f"继续未完成的下载: {file_path.name}, "
+                                f"已完成 {journal.completed_size}/{journal.total_size} 字节")
+                else:
+                    segments = self.plan_segments(probe['total_size'], max(1, part_workers), min_split_size)
+                    journal = DownloadJournal.create(journal_path, probe['url'], probe['total_size'],
+                                                     probe['etag'], probe['last_modified'], segments)
+                    await asyncio.to_thread(self._prepare_part_file, part_path, journal)
+
+                try:
+                    downloaded_size = await self._download_ranges(probe['url'], part_path, journal,
+                                                                  progress, chunk_size, hasher)
+                except RangeNotSupportedError as e:
+                    logger.warning(f"无法按范围续传，重新下载完整文件: {str(e)}")
+                    await asyncio.to_thread(journal.discard)
+                    hasher = StreamingHasher()
+
+            if downloaded_size is None:
+                downloaded_size = await self._download_stream(url, part_path, progress,
+                                                              chunk_size, hasher)
+                await asyncio.to_thread(journal_path.unlink, True)
+        finally:
+            await progress.stop()
+
+        # 报告最终进度
+        progress.tick()
+        await progress.report()
+
+        # 补算没有在下载过程中计算到的数据，正常情况下不需要读取磁盘
+        if hasher.position < downloaded_size:
+            await asyncio.to_thread(self._finish_hash, part_path, hasher, downloaded_size)
+        sha256 = hasher.hexdigest()
+
+        if expected_hash and sha256.lower() != expected_hash.lower():
+            await asyncio.to_thread(part_path.unlink, True)
+            await asyncio.to_thread(journal_path.unlink, True)
+            raise HashMismatchError(f'文件校验失败，期望 {expected_hash}，实际 {sha256}')
+
+        await asyncio.to_thread(os.replace, part_path, file_path)
+        await asyncio.to_thread(journal_path.unlink, True)
+        return {
+            'downloaded_size': downloaded_size,
+            'sha256': sha256
+        }
+
+    @staticmethod
+    def _finish_hash(part_path: Path, hasher: StreamingHasher, end: int) -> None:
+        """从磁盘补算剩余部分的哈希"""
+        with open(part_path, 'rb') as f:
+            hasher.catch_up(f, end)
+
+    @staticmethod
+    def _load_journal(journal_path: Path, part_path: Path, probe: Dict[str, Any]) -> Optional[DownloadJournal]:
+        """加载与远程文件匹配的检查点日志"""
+        if not part_path.exists():
+            return None
+        journal = DownloadJournal.load(journal_path)
+        if journal is None:
+            return None
+        if not journal.matches(probe['url'], probe['total_size'], probe['etag'], probe['last_modified']):
+            logger.info("远程文件已变化，丢弃之前的下载进度")
+            journal.discard()
+            return None
+        if part_path.stat().st_size != journal.total_size:
+            logger.warning(".part文件大小与检查点不一致，丢弃之前的下载进度")
+            journal.discard()
+            return None
+        return journal
+
+    @staticmethod
+    def _prepare_part_file(part_path: Path, journal: DownloadJournal) -> None:
+        """创建并预分配.part文件，同时写入初始检查点"""
+        with open(part_path, 'wb') as f:
+            f.truncate(journal.total_size)
+        journal.save()
+
+    async def _download_stream(self, url: str, file_path: Path, progress: ProgressAccountant,
+                               chunk_size: int, hasher: Optional[StreamingHasher] = None) -> int:
+        """单连接流式下载"""
+        session = await self.get_session()
+
+        async with session.get(url) as response:
+            response.raise_for_status()
+
+            total_size = response.content_length or 0
+            downloaded_size = 0
+            progress.reset(total_size)
+            await progress.report()
+
+            writer = FileWriter(file_path, self.max_pending_writes, hasher=hasher)
+            await writer.open('wb')
+            try:
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    await writer.write(downloaded_size, chunk)
+                    downloaded_size += len(chunk)
+                    if progress.add(len(chunk)):
+                        await progress.yield_to_loop()
+            except BaseException:
+                await writer.abort()
+                raise
+            await writer.close()
+
+        logger.debug(f"下载数据接收完成: {file_path}, 共 {downloaded_size} 字节")
+        return downloaded_size
+
+    async def _download_ranges(self, url: str, file_path: Path, journal: DownloadJournal,
+                               progress: ProgressAccountant, chunk_size: int,
+                               hasher: Optional[StreamingHasher] = None) -> int:
+        """按检查点日志中未完成的范围并发下载，各分段写入.part文件的对应偏移处"""
+        session = await self.get_session()
+        total_size = journal.total_size
+        pending = [(start, end, next_offset) for start, end, next_offset in journal.segments
+                   if next_offset < end]
+
+        logger.debug(f"使用 {len(pending)} 个分段下载: {file_path}, 总大小 {total_size} 字节")
+
+        progress.reset(total_size, journal.completed_size)
+        await progress.report()
+
+        writer = FileWriter(file_path, self.max_pending_writes, journal, hasher=hasher)
+        await writer.open('r+b')
+
+        async def fetch_segment(start: int, end: int, offset: int):
+            headers = {'Range': f'bytes={offset}-{end - 1}'}
+            if journal.if_range:
+                headers['If-Range'] = journal.if_range
+            async with session.get(url, headers=headers) as response:
+                response.raise_for_status()
+                if response.status != 206:
+                    raise RangeNotSupportedError(f'分段请求返回状态码 {response.status}')
+
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    if offset + len(chunk) > end:
+                        raise DownloadError(f'分段 {start}-{end - 1} 返回的数据超出范围')
+                    await writer.write(offset, chunk)
+                    offset += len(chunk)
+                    if progress.add(len(chunk)):
+                        await progress.yield_to_loop()
+
+                if offset != end:
+                    raise DownloadError(f'分段 {start}-{end - 1} 数据不完整')
+
+        tasks = [asyncio.create_task(fetch_segment(start, end, offset)) for start, end, offset in pending]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await writer.abort()
+            raise
+        await writer.close()
+
+        logger.debug(f"分段下载完成: {file_path}, 共 {progress.downloaded} 字节")
+        return progress.downloaded
+
+
+# 创建全局下载管理器实例
+download_manager = DownloadManager()
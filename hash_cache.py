@@ -0,0 +1,120 @@
+"""
+文件hash缓存模块
+负责持久化保存文件的SHA256哈希值，文件未变化时无需重新计算
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+from loguru import logger
+
+from system_info import system_info
+
+
+class FileHashCache:
+    """持久化的文件hash缓存，以(路径, 大小, 修改时间, inode)判断文件是否变化"""
+
+    def __init__(self, cache_file: Optional[Path] = None):
+        self.cache_file = cache_file or system_info.get_config_dir() / 'hash_cache.json'
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fingerprint(stat: os.stat_result) -> Dict[str, int]:
+        """根据文件状态生成用于判断文件是否变化的指纹"""
+        return {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'inode': stat.st_ino
+        }
+
+    def _load(self) -> None:
+        """首次访问时从磁盘加载缓存"""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        try:
+            if self.cache_file.exists():
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+        except Exception as e:
+            logger.warning(f"加载hash缓存失败，将重新计算: {str(e)}")
+            self._entries = {}
+
+    def _save(self) -> None:
+        """把缓存原子地写入磁盘"""
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.cache_file.with_name(self.cache_file.name + '.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(temp_file, self.cache_file)
+        except Exception as e:
+            logger.error(f"保存hash缓存失败: {str(e)}")
+
+    def get(self, file_path: str, stat: Optional[os.stat_result] = None) -> Optional[str]:
+        """
+        获取文件的缓存hash值
+
+        Args:
+            file_path: 文件路径
+            stat: 文件状态，为None时重新读取
+
+        Returns:
+            文件未变化时返回缓存的hash值，否则返回None
+        """
+        path = Path(file_path).resolve()
+        stat = stat or path.stat()
+
+        with self._lock:
+            self._load()
+            entry = self._entries.get(str(path))
+            if entry is None:
+                return None
+
+            fingerprint = self._fingerprint(stat)
+            if any(entry.get(key) != value for key, value in fingerprint.items()):
+                logger.debug(f"文件已变化，hash缓存失效: {path}")
+                return None
+            return entry['sha256']
+
+    def put(self, file_path: str, digest: str, stat: Optional[os.stat_result] = None) -> None:
+        """
+        写入文件的hash值
+
+        Args:
+            file_path: 文件路径
+            digest: SHA256哈希值
+            stat: 计算hash时的文件状态，为None时重新读取
+        """
+        path = Path(file_path).resolve()
+        stat = stat or path.stat()
+
+        with self._lock:
+            self._load()
+            self._entries[str(path)] = {**self._fingerprint(stat), 'sha256': digest}
+            self._save()
+
+    def invalidate(self, file_path: str) -> None:
+        """移除指定文件的缓存"""
+        path = Path(file_path).resolve()
+
+        with self._lock:
+            self._load()
+            if self._entries.pop(str(path), None) is not None:
+                self._save()
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries = {}
+            self._loaded = True
+            self._save()
+
+
+# 创建全局hash缓存实例
+hash_cache = FileHashCache()
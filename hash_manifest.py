@@ -0,0 +1,231 @@
+"""
+官方hash清单模块
+负责获取、缓存和解析官方的JiJiDownCore-hash.txt
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import requests
+from loguru import logger
+
+from system_info import system_info
+from config_manager import config_manager
+
+
+class HashManifest:
+    """
+    官方hash清单缓存
+
+    清单只解析一次并保存为 文件名 -> 条目 的字典，超过有效期后使用
+    If-None-Match/If-Modified-Since重新验证，网络不可用时继续使用最近一次获取的清单。
+    网络请求不持有锁，重新验证期间其他调用者直接使用当前清单，只有还没有清单时才等待
+    """
+
+    MANIFEST_URL = "https://jj.紫灵.top/PC/ReWPF/core/JiJiDownCore-hash.txt"
+
+    def __init__(self, url: str = MANIFEST_URL, ttl: Optional[float] = None,
+                 retry_interval: Optional[float] = None,
+                 cache_file: Optional[Path] = None, timeout: float = 10):
+        """
+        Args:
+            url: 清单地址
+            ttl: 清单有效期（秒），为None时使用配置项hash_manifest_ttl
+            retry_interval: 重新验证失败后再次尝试的最短间隔（秒），
+                为None时使用配置项hash_manifest_retry_interval，避免离线时每次都等待超时
+            cache_file: 清单缓存文件
+            timeout: 请求超时（秒）
+        """
+        self.url = url
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self.cache_file = cache_file or system_info.get_config_dir() / 'hash_manifest.json'
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.etag = ''
+        self.last_modified = ''
+        self.fetched_at = 0.0
+        # 最近一次重新验证失败，当前使用的是旧清单
+        self.stale = False
+        self._last_attempt = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+        # 重新验证完成时通知等待清单的调用者
+        self._revalidated = threading.Condition(self._lock)
+        self._revalidating = False
+        self._session = requests.Session()
+
+    @staticmethod
+    def parse(content: str) -> Dict[str, Dict[str, Any]]:
+        """
+        解析hash清单内容
+
+        Args:
+            content: 清单文本，每行格式为 hash|...|文件名
+
+        Returns:
+            文件名 -> {'hash': hash值, 'extra': 其余字段} 的字典
+        """
+        entries = {}
+        for line in content.split('\n'):
+            line = line.strip()
+            if '|' not in line:
+                continue
+            parts = [part.strip() for part in line.split('|')]
+            if len(parts) >= 3 and parts[0] and parts[2]:
+                entries[parts[2]] = {
+                    'hash': parts[0],
+                    'extra': [parts[1]] + parts[3:]
+                }
+        return entries
+
+    def set_ttl(self, ttl: Optional[float]) -> None:
+        """设置清单有效期（秒），为None时使用配置项"""
+        self.ttl = ttl
+
+    def get_ttl(self) -> float:
+        """清单有效期（秒）"""
+        return self.ttl if self.ttl is not None else config_manager.get_config('hash_manifest_ttl')
+
+    def get_retry_interval(self) -> float:
+        """重新验证失败后再次尝试的最短间隔（秒）"""
+        if self.retry_interval is not None:
+            return self.retry_interval
+        return config_manager.get_config('hash_manifest_retry_interval')
+
+    def _load(self) -> None:
+        """首次访问时从磁盘加载上次保存的清单"""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        try:
+            if self.cache_file.exists():
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('url') == self.url:
+                    self.entries = data.get('entries', {})
+                    self.etag = data.get('etag', '')
+                    self.last_modified = data.get('last_modified', '')
+                    self.fetched_at = data.get('fetched_at', 0.0)
+        except Exception as e:
+            logger.warning(f"加载hash清单缓存失败: {str(e)}")
+
+    def _save(self) -> None:
+        """把清单原子地写入磁盘"""
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.cache_file.with_name(self.cache_file.name + '.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'url': self.url,
+                    'etag': self.etag,
+                    'last_modified': self.last_modified,
+                    'fetched_at': self.fetched_at,
+                    'entries': self.entries
+                }, f, ensure_ascii=False)
+            os.replace(temp_file, self.cache_file)
+        except Exception as e:
+            logger.error(f"保存hash清单缓存失败: {str(e)}")
+
+    def _revalidate(self, headers: Dict[str, str]) -> bool:
+        """
+        向服务器重新验证清单，网络请求在锁外进行，结果在锁内写回
+
+        Args:
+            headers: 条件请求头
+
+        Returns:
+            bool: 是否成功获取到最新清单
+        """
+        try:
+            response = self._session.get(self.url, headers=headers, timeout=self.timeout)
+            if response.status_code != 304:
+                response.raise_for_status()
+                # 解析在锁外进行
+                entries = self.parse(response.text)
+
+            with self._lock:
+                if response.status_code == 304:
+                    logger.debug("官方hash清单未变化")
+                else:
+                    self.entries = entries
+                    self.etag = response.headers.get('ETag', '')
+                    self.last_modified = response.headers.get('Last-Modified', '')
+                    logger.debug(f"官方hash清单已更新，共 {len(self.entries)} 项")
+
+                self.fetched_at = time.time()
+                self.stale = False
+                self._save()
+            return True
+
+        except Exception as e:
+            with self._lock:
+                self.stale = True
+                has_entries = bool(self.entries)
+            if has_entries:
+                logger.warning(f"获取官方hash失败，使用上次获取的清单: {str(e)}")
+            else:
+                logger.error(f"获取官方hash失败: {str(e)}")
+            return False
+
+    def get_entries(self, force: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        获取清单，超过有效期时重新验证
+
+        Args:
+            force: 是否忽略有效期强制重新验证
+
+        Returns:
+            文件名 -> 条目 的字典，从未获取成功时为空字典
+        """
+        ttl = self.get_ttl()
+        retry_interval = self.get_retry_interval()
+
+        with self._lock:
+            self._load()
+            if self._revalidating:
+                # 其他调用者正在重新验证，还没有清单或要求最新清单时等待其完成
+                if force or not self.entries:
+                    self._revalidated.wait_for(lambda: not self._revalidating, self.timeout + 1)
+                return self.entries
+
+            now = time.time()
+            expired = not self.entries or now - self.fetched_at >= ttl
+            retry_allowed = now - self._last_attempt >= min(ttl, retry_interval)
+            if not (force or (expired and retry_allowed)):
+                return self.entries
+
+            headers = {}
+            if self.entries:
+                if self.etag:
+                    headers['If-None-Match'] = self.etag
+                if self.last_modified:
+                    headers['If-Modified-Since'] = self.last_modified
+            self._last_attempt = now
+            self._revalidating = True
+
+        try:
+            self._revalidate(headers)
+        finally:
+            with self._lock:
+                self._revalidating = False
+                self._revalidated.notify_all()
+        return self.entries
+
+    def get_entry(self, filename: str, force: bool = False) -> Optional[Dict[str, Any]]:
+        """获取指定文件的清单条目"""
+        return self.get_entries(force).get(filename)
+
+    def get_hash(self, filename: str, force: bool = False) -> Optional[str]:
+        """获取指定文件的官方hash值"""
+        entry = self.get_entry(filename, force)
+        return entry['hash'] if entry else None
+
+
+# 创建全局hash清单实例
+hash_manifest = HashManifest()
@@ -0,0 +1,278 @@
+"""
+日志归档压缩模块
+负责把归档日志压缩为分块格式，读取时只需要解压用到的块
+"""
+
+import bisect
+import gzip
+import json
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from loguru import logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# 压缩格式对应的文件后缀
+CODEC_SUFFIXES = {'zstd': '.zst', 'gzip': '.gz'}
+
+# 每块压缩前的大小，块总是在行尾切分
+BLOCK_SIZE = 256 * 1024
+
+# 分块索引文件的后缀
+INDEX_SUFFIX = '.idx'
+
+
+def get_default_codec() -> str:
+    """安装了zstandard时使用zstd，否则使用gzip"""
+    return 'zstd' if zstandard is not None else 'gzip'
+
+
+def is_compressed(path: Path) -> bool:
+    """是否为压缩后的归档文件"""
+    return path.suffix in CODEC_SUFFIXES.values()
+
+
+def get_index_path(path: Path) -> Path:
+    """获取压缩归档文件的分块索引路径"""
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def _compress_block(codec: str, data: bytes) -> bytes:
+    """压缩一块数据为独立的gzip成员或zstd帧"""
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _decompress_block(codec: str, data: bytes) -> bytes:
+    """解压一块数据"""
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("读取zstd压缩的归档需要安装zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class BlockArchive:
+    """
+    分块压缩的归档日志
+
+    文件由若干独立压缩的块首尾相接组成（连接起来仍是合法的gzip/zstd流，可以直接用zcat查看），
+    旁边的.idx文件记录每块压缩后和解压后的偏移与长度，按解压后的偏移读取时只解压需要的块
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(get_index_path(path), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        self.codec: str = index['codec']
+        self.raw_size: int = index['raw_size']
+        # 每块为 [压缩后偏移, 压缩后长度, 解压后偏移, 解压后长度]
+        self.blocks: List[List[int]] = index['blocks']
+        self.source: Optional[List[int]] = index.get('source')
+        self._raw_offsets = [block[2] for block in self.blocks]
+
+    def read_block(self, block_index: int) -> bytes:
+        """读取并解压一块数据"""
+        offset, size = self.blocks[block_index][:2]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return _decompress_block(self.codec, f.read(size))
+
+    def find_block(self, raw_offset: int) -> int:
+        """找到包含解压后偏移raw_offset处字节的块"""
+        return max(bisect.bisect_right(self._raw_offsets, raw_offset) - 1, 0)
+
+    def read_head(self, size: int) -> bytes:
+        """读取解压后开头的size字节"""
+        if not self.blocks:
+            return b''
+        return self.read_block(0)[:size]
+
+    def iter_blocks(self, raw_offset: int = 0) -> Iterator[Tuple[bytes, int]]:
+        """
+        从解压后偏移raw_offset开始逐块读取
+
+        Returns:
+            Iterator[Tuple[bytes, int]]: (数据, 这段数据之后的解压后偏移)
+        """
+        if raw_offset >= self.raw_size:
+            return
+        for block_index in range(self.find_block(raw_offset), len(self.blocks)):
+            block_raw_offset, block_raw_size = self.blocks[block_index][2:]
+            data = self.read_block(block_index)
+            yield data[max(raw_offset - block_raw_offset, 0):], block_raw_offset + block_raw_size
+
+    def tail(self, limit: int, end: Optional[int] = None) -> Tuple[List[bytes], int]:
+        """
+        从解压后偏移end向前读取最后limit行，只解压需要的块
+
+        Returns:
+            Tuple[List[bytes], int]: (按时间顺序排列的行, 最早一行的解压后起始偏移)
+        """
+        position = self.raw_size if end is None else min(end, self.raw_size)
+        lines: List[bytes] = []
+        while len(lines) < limit and position > 0:
+            block_index = self.find_block(position - 1)
+            block_raw_offset = self.blocks[block_index][2]
+            # 块总是在行尾切分，块内都是完整的行
+            data = self.read_block(block_index)[:position - block_raw_offset]
+            if data.endswith(b'\n'):
+                data = data[:-1]
+            parts = data.split(b'\n')[-(limit - len(lines)):]
+            lines[:0] = parts
+            position = block_raw_offset + len(data) - (sum(len(part) for part in parts) + len(parts) - 1)
+        return lines, position
+
+
+# 已打开的归档，按(路径, inode, 修改时间)缓存，避免重复解析索引
+_archive_cache: Dict[Tuple[str, int, int], BlockArchive] = {}
+
+
+def open_archive(path: Path) -> BlockArchive:
+    """打开压缩归档，索引只解析一次"""
+    stat = path.stat()
+    key = (str(path), stat.st_ino, stat.st_mtime_ns)
+    archive = _archive_cache.get(key)
+    if archive is None:
+        if len(_archive_cache) > 64:
+            _archive_cache.clear()
+        archive = _archive_cache[key] = BlockArchive(path)
+    return archive
+
+
+def compress_file(source_path: Path, codec: Optional[str] = None, lock: Optional[threading.Lock] = None,
+                  block_size: int = BLOCK_SIZE) -> Path:
+    """
+    把纯文本归档压缩为分块格式，完成后删除原文件
+
+    Args:
+        source_path: 纯文本归档路径
+        codec: 压缩格式，为None时根据是否安装zstandard选择
+        lock: 替换文件时持有的锁，防止读取者看到替换到一半的文件
+        block_size: 每块压缩前的大小
+
+    Returns:
+        Path: 压缩后的归档路径
+    """
+    codec = codec or get_default_codec()
+    target_path = source_path.with_name(source_path.name + CODEC_SUFFIXES[codec])
+    index_path = get_index_path(target_path)
+    temp_path = target_path.with_name(target_path.name + '.tmp')
+    temp_index_path = index_path.with_name(index_path.name + '.tmp')
+
+    stat = source_path.stat()
+    blocks = []
+    raw_offset = 0
+    compressed_offset = 0
+    with open(source_path, 'rb') as src, open(temp_path, 'wb') as dst:
+        remainder = b''
+        while True:
+            chunk = src.read(block_size)
+            data = remainder + chunk
+            if not data:
+                break
+            # 在最后一个换行符处切分，保证每块都是完整的行
+            cut = len(data) if not chunk else data.rfind(b'\n') + 1
+            if cut <= 0:
+                if len(data) < 4 * block_size:
+                    remainder = data
+                    continue
+                # 超长的行直接切分
+                cut = len(data)
+            block, remainder = data[:cut], data[cut:]
+
+            compressed = _compress_block(codec, block)
+            dst.write(compressed)
+            blocks.append([compressed_offset, len(compressed), raw_offset, len(block)])
+            compressed_offset += len(compressed)
+            raw_offset += len(block)
+            if not chunk:
+                break
+        dst.flush()
+        os.fsync(dst.fileno())
+
+    with open(temp_index_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'codec': codec,
+            'raw_size': raw_offset,
+            'blocks': blocks,
+            # 原文件的(st_dev, st_ino)，日志索引据此沿用已建立的索引
+            'source': [stat.st_dev, stat.st_ino]
+        }, f)
+
+    lock = lock or threading.Lock()
+    with lock:
+        os.replace(temp_index_path, index_path)
+        os.replace(temp_path, target_path)
+        source_path.unlink()
+
+    logger.info(f"归档日志已压缩: {target_path.name} ({stat.st_size} -> {compressed_offset} 字节)")
+    return target_path
+
+
+def remove_archive(path: Path) -> None:
+    """删除归档文件及其分块索引"""
+    path.unlink(missing_ok=True)
+    if is_compressed(path):
+        get_index_path(path).unlink(missing_ok=True)
+
+
+class LogArchiver:
+    """
+    后台归档压缩器
+
+    归档文件由专用线程逐个压缩，不阻塞写入日志的线程和事件循环
+    """
+
+    def __init__(self, lock: Optional[threading.Lock] = None, codec: Optional[str] = None):
+        self.lock = lock
+        self.codec = codec
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+
+    def submit(self, path: Path, on_done: Optional[Callable[[], None]] = None) -> None:
+        """
+        提交一个纯文本归档等待压缩
+
+        Args:
+            path: 纯文本归档路径
+            on_done: 压缩完成后在压缩线程中调用的函数，不接收参数
+        """
+        with self._pending_lock:
+            if path in self._pending:
+                return
+            self._pending.add(path)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='LogArchiver', daemon=True)
+                self._thread.start()
+        self._queue.put((path, on_done))
+
+    def _run(self) -> None:
+        """压缩线程主循环"""
+        while True:
+            path, on_done = self._queue.get()
+            try:
+                if path.exists():
+                    compress_file(path, self.codec, self.lock)
+                if on_done is not None:
+                    on_done()
+            except Exception as e:
+                logger.error(f"压缩归档日志失败: {str(e)}")
+            finally:
+                with self._pending_lock:
+                    self._pending.discard(path)
+                self._queue.task_done()
+
+    def join(self) -> None:
+        """等待已提交的归档全部压缩完成"""
+        self._queue.join()
@@ -0,0 +1,97 @@
+"""
+日志桥接模块
+负责把读取线程中的核心日志安全地交给asyncio事件循环处理
+"""
+
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+
+class LogBridge:
+    """
+    线程到事件循环的日志桥
+
+    读取线程把日志放入有界队列，只在队列由空变为非空时通过call_soon_threadsafe
+    唤醒一次事件循环，事件循环一次取出队列中的所有日志批量分发。
+    突发输出时每批日志只需要一次线程切换，回调也总是在事件循环线程中执行
+    """
+
+    def __init__(self, dispatch: Callable[[List[Any]], None], max_pending: int = 10000):
+        """
+        Args:
+            dispatch: 在事件循环中处理一批日志的函数
+            max_pending: 队列最多保留的日志数，事件循环来不及处理时丢弃最旧的日志
+        """
+        self.dispatch = dispatch
+        self.max_pending = max_pending
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {
+            'received': 0,
+            'dispatched': 0,
+            'batches': 0,
+            'dropped': 0
+        }
+
+    def attach(self, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """
+        设置分发日志的事件循环
+
+        Args:
+            loop: 事件循环，为None时在调用put的线程中直接分发
+        """
+        self._loop = loop
+
+    def put(self, item: Any) -> None:
+        """在读取线程中加入一条日志"""
+        with self._lock:
+            if len(self._queue) >= self.max_pending:
+                self._queue.popleft()
+                self.stats['dropped'] += 1
+            self._queue.append(item)
+            self.stats['received'] += 1
+
+            # 已经安排过分发时，这条日志会在同一批中处理
+            if self._scheduled:
+                return
+            self._scheduled = True
+
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self._drain()
+            return
+
+        try:
+            loop.call_soon_threadsafe(self._drain)
+        except RuntimeError:
+            # 事件循环已关闭
+            self._drain()
+
+    def _drain(self) -> None:
+        """取出队列中的所有日志并分发"""
+        with self._lock:
+            batch = list(self._queue)
+            self._queue.clear()
+            self._scheduled = False
+
+        if not batch:
+            return
+
+        try:
+            self.dispatch(batch)
+        except Exception as e:
+            logger.error(f"日志分发失败: {str(e)}")
+
+        self.stats['dispatched'] += len(batch)
+        self.stats['batches'] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取分发统计信息"""
+        stats = self.stats.copy()
+        stats['pending'] = len(self._queue)
+        return stats
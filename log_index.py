@@ -0,0 +1,295 @@
+"""
+日志索引模块
+负责为当前日志和归档日志建立SQLite全文索引，支持按等级、时间范围和任务ID筛选搜索
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from loguru import logger
+
+from log_archive import BlockArchive, is_compressed, open_archive
+from log_manager import CoreLogManager, log_manager
+from log_parser import parse_record
+
+
+class LogIndex:
+    """
+    日志全文索引
+
+    每个日志文件以(st_dev, st_ino)标识并记录已索引到的字节偏移，每次更新只解析新追加的内容，
+    日志轮转和归档只是重命名文件，已建立的索引不需要重建，归档压缩后按记录的原文件沿用索引。
+    SQLite支持FTS5时使用trigram分词
+    建立全文索引（中文不需要分词也能子串匹配），否则退回到LIKE查询
+    """
+
+    # 每次从日志文件读取的最大字节数
+    READ_SIZE = 4 * 1024 * 1024
+    # 用于识别inode被新文件复用的文件头长度
+    HEAD_SIZE = 64
+
+    def __init__(self, manager: CoreLogManager, db_path: Optional[Path] = None):
+        self.manager = manager
+        self.db_path = db_path or manager.log_file_path.parent / 'log_index.db'
+        self.fts_enabled = False
+        # trigram分词要求查询词至少3个字符，更短的查询使用LIKE
+        self.fts_min_query = 3
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """首次访问时打开数据库并建表"""
+        if self._conn is not None:
+            return self._conn
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS log_files (
+                id INTEGER PRIMARY KEY,
+                dev INTEGER NOT NULL,
+                ino INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                head BLOB,
+                offset INTEGER NOT NULL DEFAULT 0,
+                UNIQUE (dev, ino)
+            );
+            CREATE TABLE IF NOT EXISTS log_records (
+                id INTEGER PRIMARY KEY,
+                file_id INTEGER NOT NULL,
+                timestamp REAL NOT NULL,
+                level TEXT NOT NULL,
+                task_id TEXT,
+                message TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_log_records_file ON log_records (file_id);
+            CREATE INDEX IF NOT EXISTS idx_log_records_time ON log_records (timestamp);
+            CREATE INDEX IF NOT EXISTS idx_log_records_level ON log_records (level, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_log_records_task ON log_records (task_id, timestamp);
+        ''')
+
+        try:
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS log_fts USING fts5(message, tokenize='trigram')")
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite不支持FTS5 trigram分词，使用LIKE搜索日志: {str(e)}")
+        conn.commit()
+
+        self._conn = conn
+        return conn
+
+    def _read_new_lines(self, path: Path, offset: int) -> Iterator[Tuple[List[str], int]]:
+        """从offset开始分块读取完整的新行，逐块返回(行列表, 读取后的偏移)"""
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            remainder = b''
+            while True:
+                block = f.read(self.READ_SIZE)
+                if not block:
+                    break
+                # data从offset处开始，最后一个换行符之后的不完整行留到下一块
+                data = remainder + block
+                end = data.rfind(b'\n')
+                if end < 0:
+                    remainder = data
+                    continue
+                remainder = data[end + 1:]
+                offset += end + 1
+                yield data[:end].decode('utf-8', errors='replace').split('\n'), offset
+
+    def _read_archive_lines(self, archive: BlockArchive, offset: int) -> Iterator[Tuple[List[str], int]]:
+        """从解压后偏移offset开始逐块读取压缩归档，只解压需要的块"""
+        for data, offset in archive.iter_blocks(offset):
+            text = data.decode('utf-8', errors='replace')
+            if text.endswith('\n'):
+                text = text[:-1]
+            yield text.split('\n'), offset
+
+    def _delete_file_records(self, conn: sqlite3.Connection, file_id: int) -> None:
+        """删除某个日志文件的所有索引记录"""
+        if self.fts_enabled:
+            conn.execute('DELETE FROM log_fts WHERE rowid IN (SELECT id FROM log_records WHERE file_id = ?)', (file_id,))
+        conn.execute('DELETE FROM log_records WHERE file_id = ?', (file_id,))
+
+    def _index_file(self, conn: sqlite3.Connection, path: Path, stat: os.stat_result) -> int:
+        """索引单个日志文件新追加的内容，返回新增的记录数"""
+        archive = open_archive(path) if is_compressed(path) else None
+        if archive is not None:
+            head = archive.read_head(self.HEAD_SIZE)
+            size = archive.raw_size
+        else:
+            with open(path, 'rb') as f:
+                head = f.read(self.HEAD_SIZE)
+            size = stat.st_size
+
+        row = conn.execute('SELECT id, head, offset FROM log_files WHERE dev = ? AND ino = ?',
+                           (stat.st_dev, stat.st_ino)).fetchone()
+        if row is None and archive is not None and archive.source:
+            # 压缩后的归档沿用原文件的索引
+            row = conn.execute('SELECT id, head, offset FROM log_files WHERE dev = ? AND ino = ?',
+                               tuple(archive.source)).fetchone()
+            if row is not None:
+                conn.execute('UPDATE log_files SET dev = ?, ino = ? WHERE id = ?', (stat.st_dev, stat.st_ino, row[0]))
+        if row is None:
+            cursor = conn.execute('INSERT INTO log_files (dev, ino, path, head, offset) VALUES (?, ?, ?, ?, 0)',
+                                  (stat.st_dev, stat.st_ino, str(path), head))
+            file_id, offset = cursor.lastrowid, 0
+        else:
+            file_id, indexed_head, offset = row
+            # 文件被截断或inode被新文件复用时重新索引
+            known = bytes(indexed_head or b'')
+            if size < offset or head[:len(known)] != known[:len(head)]:
+                self._delete_file_records(conn, file_id)
+                offset = 0
+            conn.execute('UPDATE log_files SET path = ?, head = ? WHERE id = ?', (str(path), head, file_id))
+
+        if size <= offset:
+            return 0
+
+        if archive is not None:
+            new_lines = self._read_archive_lines(archive, offset)
+        else:
+            new_lines = self._read_new_lines(path, offset)
+
+        added = 0
+        for lines, offset in new_lines:
+            records = [parse_record(line) for line in lines if line.strip()]
+            rows = [(file_id, record.timestamp, record.level, record.task_id, record.raw) for record in records]
+            if self.fts_enabled:
+                for values in rows:
+                    cursor = conn.execute('INSERT INTO log_records (file_id, timestamp, level, task_id, message) '
+                                          'VALUES (?, ?, ?, ?, ?)', values)
+                    conn.execute('INSERT INTO log_fts (rowid, message) VALUES (?, ?)', (cursor.lastrowid, values[4]))
+            else:
+                conn.executemany('INSERT INTO log_records (file_id, timestamp, level, task_id, message) '
+                                 'VALUES (?, ?, ?, ?, ?)', rows)
+            conn.execute('UPDATE log_files SET offset = ? WHERE id = ?', (offset, file_id))
+            added += len(rows)
+        return added
+
+    def update(self) -> int:
+        """
+        索引当前日志和归档日志中新增的内容，并删除已不存在的日志文件的索引
+
+        Returns:
+            int: 新增的记录数
+        """
+        # 确保写入队列中的日志已写入文件
+        self.manager.flush()
+
+        with self._lock:
+            try:
+                conn = self._connect()
+                added = 0
+                seen = set()
+                with conn:
+                    for path in self.manager._get_log_sources():
+                        try:
+                            stat = path.stat()
+                        except OSError:
+                            continue
+                        seen.add((stat.st_dev, stat.st_ino))
+                        added += self._index_file(conn, path, stat)
+
+                    for file_id, dev, ino in conn.execute('SELECT id, dev, ino FROM log_files').fetchall():
+                        if (dev, ino) not in seen:
+                            self._delete_file_records(conn, file_id)
+                            conn.execute('DELETE FROM log_files WHERE id = ?', (file_id,))
+
+                if added:
+                    logger.debug(f"日志索引新增 {added} 条记录")
+                return added
+
+            except Exception as e:
+                logger.error(f"更新日志索引失败: {str(e)}")
+                return 0
+
+    def search(self, query: str = '', level: Optional[str] = None, since: Optional[float] = None,
+               until: Optional[float] = None, task_id: Optional[str] = None,
+               limit: int = 200) -> List[Dict[str, Any]]:
+        """
+        搜索已索引的日志
+
+        Args:
+            query: 搜索的文本，为空时只按条件筛选
+            level: 日志等级
+            since: 起始时间戳（包含）
+            until: 结束时间戳（不包含）
+            task_id: 任务ID
+            limit: 最多返回的记录数
+
+        Returns:
+            List[Dict[str, Any]]: 按时间从新到旧排列的记录，包含timestamp、level、task_id、message、path
+        """
+        with self._lock:
+            try:
+                self._connect()
+            except Exception as e:
+                logger.error(f"搜索日志失败: {str(e)}")
+                return []
+
+        conditions = []
+        params: List[Any] = []
+        query = query.strip()
+
+        if query:
+            if self.fts_enabled and len(query) >= self.fts_min_query:
+                # 作为短语查询，避免用户输入被解释为FTS5语法
+                conditions.append('r.id IN (SELECT rowid FROM log_fts WHERE log_fts MATCH ?)')
+                params.append('"' + query.replace('"', '""') + '"')
+            else:
+                escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                conditions.append("r.message LIKE ? ESCAPE '\\'")
+                params.append(f'%{escaped}%')
+        if level:
+            conditions.append('r.level = ?')
+            params.append(level)
+        if since is not None:
+            conditions.append('r.timestamp >= ?')
+            params.append(since)
+        if until is not None:
+            conditions.append('r.timestamp < ?')
+            params.append(until)
+        if task_id:
+            conditions.append('r.task_id = ?')
+            params.append(task_id)
+
+        sql = ('SELECT r.timestamp, r.level, r.task_id, r.message, f.path '
+               'FROM log_records r JOIN log_files f ON f.id = r.file_id')
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY r.timestamp DESC, r.id DESC LIMIT ?'
+        params.append(limit)
+
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, params).fetchall()
+            except Exception as e:
+                logger.error(f"搜索日志失败: {str(e)}")
+                return []
+
+        return [
+            {'timestamp': timestamp, 'level': level, 'task_id': task_id, 'message': message, 'path': path}
+            for timestamp, level, task_id, message, path in rows
+        ]
+
+    async def search_async(self, query: str = '', **filters) -> List[Dict[str, Any]]:
+        """在后台线程中更新索引并搜索，不阻塞事件循环"""
+        await asyncio.to_thread(self.update)
+        return await asyncio.to_thread(self.search, query, **filters)
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# 创建全局日志索引实例
+log_index = LogIndex(log_manager)
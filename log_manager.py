@@ -3,50 +3,372 @@
 负责日志的持久化存储和恢复
 """
 
+import mmap
+import os
+import queue
+import shutil
+import threading
 import time
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from loguru import logger
 
+from log_archive import LogArchiver, is_compressed, open_archive, remove_archive
+
+
+def _tail_mmap(f, end: int, limit: int) -> Tuple[List[bytes], int]:
+    """通过mmap从end向前查找换行符，只有被访问到的页会从磁盘读入"""
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        lines = []
+        stop = end
+        start = end
+        # 最后一行的换行符不算作新的一行
+        if stop > 0 and mm[stop - 1:stop] == b'\n':
+            stop -= 1
+        while len(lines) < limit and stop > 0:
+            newline = mm.rfind(b'\n', 0, stop)
+            start = newline + 1
+            lines.append(mm[start:stop])
+            stop = newline
+        lines.reverse()
+        return lines, start if stop > 0 else 0
+
+
+def _tail_blocks(f, end: int, limit: int, block_size: int) -> Tuple[List[bytes], int]:
+    """从end开始按块向前读取，直到凑够limit个完整的行"""
+    buffer = b''
+    newlines = 0
+    position = end
+    while position > 0 and newlines <= limit:
+        read_size = min(block_size, position)
+        position -= read_size
+        f.seek(position)
+        block = f.read(read_size)
+        newlines += block.count(b'\n')
+        buffer = block + buffer
+
+    content_end = end
+    if buffer.endswith(b'\n'):
+        buffer = buffer[:-1]
+        content_end -= 1
+    if not buffer and content_end <= 0:
+        return [], 0
+
+    parts = buffer.split(b'\n')
+    # 没有读到文件开头时，第一段是不完整的行
+    if position > 0:
+        parts = parts[1:]
+    lines = parts[-limit:]
+    start = content_end - (sum(len(line) for line in lines) + len(lines) - 1)
+    return lines, start
+
+
+def tail_lines(path: Path, limit: int, end: Optional[int] = None,
+               block_size: int = 64 * 1024) -> Tuple[List[str], int]:
+    """
+    从文件末尾向前读取最后limit行，不读取整个文件
+
+    Args:
+        path: 文件路径
+        limit: 最多读取的行数
+        end: 从该字节偏移向前读取，为None时从文件末尾开始
+        block_size: 无法使用mmap时每次向前读取的块大小
+
+    Returns:
+        Tuple[List[str], int]: (按时间顺序排列的行, 最早一行的起始偏移)，
+        偏移为0表示已经读到文件开头，可作为下一次读取的end继续向前翻页
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        end = size if end is None else min(end, size)
+        if end <= 0 or limit <= 0:
+            return [], max(end, 0)
+
+        try:
+            raw_lines, start = _tail_mmap(f, end, limit)
+        except (ValueError, OSError):
+            # 部分平台或文件系统不支持mmap
+            raw_lines, start = _tail_blocks(f, end, limit, block_size)
+
+    return [line.decode('utf-8', errors='replace').strip() for line in raw_lines], start
+
+
+class _FlushRequest:
+    """写入线程处理到该标记时，说明之前提交的日志都已写入"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class LogWriter:
+    """
+    批量异步日志写入器
+    
+    日志行通过有界队列交给专用的写入线程，写入线程凑够batch_size行或等待
+    flush_interval秒后一次性写入（组提交），队列满时丢弃新日志并计数，
+    保证读取核心输出的线程不会被磁盘延迟阻塞
+    """
+    
+    FSYNC_POLICIES = ('never', 'batch', 'interval')
+    
+    def __init__(self, write_batch: Callable[[List[str], bool], None], max_queue_size: int = 10000,
+                 batch_size: int = 256, flush_interval: float = 0.2,
+                 fsync_policy: str = 'interval', fsync_interval: float = 1.0):
+        """
+        Args:
+            write_batch: 实际写入函数，参数为(日志行列表, 是否fsync)
+            max_queue_size: 队列最大长度
+            batch_size: 每批最多写入的行数
+            flush_interval: 凑批的最长等待时间（秒）
+            fsync_policy: fsync策略，never为不主动fsync，batch为每批fsync，interval为按间隔fsync
+            fsync_interval: fsync_policy为interval时的fsync间隔（秒）
+        """
+        if fsync_policy not in self.FSYNC_POLICIES:
+            raise ValueError(f"未知的fsync策略: {fsync_policy}")
+        
+        self._write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._last_fsync = time.monotonic()
+        # 统计信息由提交日志的线程和写入线程共同更新
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'submitted': 0,
+            'dropped': 0,
+            'written': 0,
+            'batches': 0,
+            'fsyncs': 0,
+            'errors': 0
+        }
+    
+    def _ensure_started(self) -> None:
+        """首次提交日志时启动写入线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='core-log-writer', daemon=True)
+                self._thread.start()
+    
+    def submit(self, line: str) -> bool:
+        """
+        提交一行日志，不会阻塞
+        
+        Returns:
+            bool: 是否成功加入队列，队列已满时返回False
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(line)
+            self._count('submitted')
+            return True
+        except queue.Full:
+            self._count('dropped')
+            return False
+    
+    def _count(self, name: str, value: int = 1) -> None:
+        """增加一项统计"""
+        with self._stats_lock:
+            self.stats[name] += value
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        等待已提交的日志全部写入，队列已满时等待队列空出的时间也计入timeout
+        
+        Returns:
+            bool: 是否在超时前完成
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        deadline = time.monotonic() + timeout
+        request = _FlushRequest()
+        try:
+            self._queue.put(request, timeout=timeout)
+        except queue.Full:
+            logger.warning("日志写入队列已满，等待写入超时")
+            return False
+        return request.done.wait(max(deadline - time.monotonic(), 0))
+    
+    def close(self, timeout: float = 5.0) -> None:
+        """写入剩余日志并停止写入线程"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning("日志写入队列已满，停止写入线程超时")
+            return
+        self._thread.join(max(deadline - time.monotonic(), 0))
+    
+    def _run(self) -> None:
+        """写入线程：按数量或时间凑批，每批调用一次写入函数"""
+        while True:
+            item = self._queue.get()
+            batch = []
+            requests = []
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            
+            while True:
+                if item is None:
+                    stop = True
+                    break
+                if isinstance(item, _FlushRequest):
+                    requests.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get_nowait() if remaining <= 0 else self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            
+            if batch:
+                self._commit(batch, bool(requests) or stop)
+            for request in requests:
+                request.done.set()
+            if stop:
+                break
+    
+    def _commit(self, batch: List[str], force_fsync: bool) -> None:
+        """写入一批日志，并按策略决定是否fsync"""
+        now = time.monotonic()
+        if self.fsync_policy == 'batch':
+            fsync = True
+        elif self.fsync_policy == 'interval':
+            fsync = force_fsync or now - self._last_fsync >= self.fsync_interval
+        else:
+            fsync = False
+        
+        try:
+            self._write_batch(batch, fsync)
+            with self._stats_lock:
+                self.stats['written'] += len(batch)
+                self.stats['batches'] += 1
+                if fsync:
+                    self.stats['fsyncs'] += 1
+            if fsync:
+                self._last_fsync = now
+        except Exception as e:
+            self._count('errors')
+            logger.error(f"批量写入日志失败: {str(e)}")
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取写入统计信息，包括当前队列深度和丢弃数量"""
+        with self._stats_lock:
+            stats = self.stats.copy()
+        stats['queue_depth'] = self._queue.qsize()
+        return stats
+
 
 class CoreLogManager:
-    """日志管理器，负责日志的持久化存储和恢复"""
+    """
+    日志管理器，负责日志的持久化存储和恢复
+    
+    日志以两个分段轮转保存：core_log.txt为当前分段，写满max_log_lines行后
+    整体替换上一个分段core_log.1.txt。每写一行只需要一次追加，
+    磁盘上始终保留最近max_log_lines到2*max_log_lines行日志。
+    清空日志时保留归档文件，但更早的归档不再出现在日志页面和搜索中
+    """
     
     def __init__(self, log_file_path: str = "logs/core_log.txt"):
         self.log_file_path = Path(log_file_path)
         self.log_file_path.parent.mkdir(parents=True, exist_ok=True)
         self.max_log_lines = 1000  # 最大保存日志行数
+        # 上一个日志分段
+        self.previous_log_path = self.log_file_path.with_name(
+            f"{self.log_file_path.stem}.1{self.log_file_path.suffix}")
+        # 记录最后一次清空日志时的归档名称分界，不晚于它的归档已被清空
+        self.cleared_marker_path = self.log_file_path.with_suffix('.cleared')
+        self._file = None
+        self._line_count: Optional[int] = None
+        self._lock = threading.Lock()
+        # 日志由专用线程批量写入
+        self.writer = LogWriter(self._write_batch)
+        # 归档文件由后台线程压缩，归档总大小超过该值时删除最旧的归档
+        self.archiver = LogArchiver(self._lock)
+        self.max_archive_size = 100 * 1024 * 1024
+    
+    def _count_lines(self) -> int:
+        """统计当前分段的行数，只在首次写入时执行一次"""
+        if not self.log_file_path.exists():
+            return 0
+        count = 0
+        with open(self.log_file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                count += block.count(b'\n')
+        return count
+    
+    def _open(self):
+        """打开当前分段用于追加写入"""
+        if self._file is None:
+            if self._line_count is None:
+                self._line_count = self._count_lines()
+            self._file = open(self.log_file_path, 'a', encoding='utf-8')
+        return self._file
+    
+    def _close(self) -> None:
+        """关闭当前分段的文件句柄"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def _rotate(self) -> None:
+        """当前分段写满后替换上一个分段，并开始新的当前分段"""
+        self._close()
+        os.replace(self.log_file_path, self.previous_log_path)
+        self._line_count = 0
         
     def archive_logs(self) -> bool:
-        """归档当前日志文件，将core_log.txt重命名为带时间戳的文件"""
+        """归档当前日志，将上一个分段和core_log.txt合并为带时间戳的文件"""
         try:
-            if not self.log_file_path.exists():
-                logger.info("日志文件不存在，无需归档")
-                return True
+            self.writer.flush()
+            with self._lock:
+                self._close()
                 
-            # 获取文件大小
-            file_size = self.log_file_path.stat().st_size
-            
-            # 如果文件为空或很小，无需归档
-            if file_size == 0:
-                logger.info("日志文件为空，无需归档")
-                return True
+                if not self.log_file_path.exists() and not self.previous_log_path.exists():
+                    logger.info("日志文件不存在，无需归档")
+                    return True
+                    
+                # 获取文件大小
+                file_size = sum(path.stat().st_size for path in (self.previous_log_path, self.log_file_path)
+                                if path.exists())
                 
-            # 生成归档文件名（带时间戳和毫秒）
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            milliseconds = int(time.time() * 1000) % 1000
-            archive_filename = f"{self.log_file_path.stem}_{timestamp}_{milliseconds:03d}.txt"
-            archive_path = self.log_file_path.parent / archive_filename
-            
-            # 重命名文件进行归档
-            self.log_file_path.rename(archive_path)
-            logger.info(f"日志文件已归档: {archive_filename} (大小: {file_size} 字节)")
-            
-            # 创建新的空日志文件
-            self.log_file_path.touch()
+                # 如果文件为空或很小，无需归档
+                if file_size == 0:
+                    logger.info("日志文件为空，无需归档")
+                    return True
+                    
+                # 生成归档文件名（带时间戳和毫秒）
+                archive_filename = f"{self._archive_stamp()}.txt"
+                archive_path = self.log_file_path.parent / archive_filename
+                
+                # 把当前分段追加到上一个分段之后，再重命名进行归档
+                if self.previous_log_path.exists():
+                    if self.log_file_path.exists():
+                        with open(self.previous_log_path, 'ab') as dst, open(self.log_file_path, 'rb') as src:
+                            shutil.copyfileobj(src, dst)
+                        self.log_file_path.unlink()
+                    self.previous_log_path.rename(archive_path)
+                else:
+                    self.log_file_path.rename(archive_path)
+                logger.info(f"日志文件已归档: {archive_filename} (大小: {file_size} 字节)")
+                
+                # 创建新的空日志文件
+                self.log_file_path.touch()
+                self._line_count = 0
             
-            # 清理旧的归档文件（保留最近7天的归档）
-            self._cleanup_old_archives()
+            # 在后台压缩归档，完成后清理旧的归档文件
+            self.compress_pending_archives()
             
             return True
             
@@ -54,101 +376,233 @@ class CoreLogManager:
             logger.error(f"日志归档失败: {str(e)}")
             return False
     
-    def _cleanup_old_archives(self, retention_days: int = 7):
-        """清理旧的归档文件，保留指定天数内的文件"""
+    def _archive_stamp(self) -> str:
+        """当前时间的归档名称（不含扩展名），按名称排序即按时间排序"""
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        milliseconds = int(time.time() * 1000) % 1000
+        return f"{self.log_file_path.stem}_{timestamp}_{milliseconds:03d}"
+    
+    def _get_cleared_stamp(self) -> str:
+        """最后一次清空日志时的归档名称分界，从未清空时为空字符串"""
         try:
-            # 获取当前时间
-            current_time = time.time()
-            cutoff_time = current_time - (retention_days * 24 * 60 * 60)
-            
-            # 查找所有归档文件（基于当前日志文件名模式）
-            archive_pattern = f"{self.log_file_path.stem}_*.txt"
-            archive_files = list(self.log_file_path.parent.glob(archive_pattern))
+            return self.cleared_marker_path.read_text(encoding='utf-8').strip()
+        except OSError:
+            return ''
+    
+    def _get_archives(self) -> List[Path]:
+        """按从新到旧的顺序列出归档文件，包括压缩后的归档"""
+        archives = []
+        for path in self.log_file_path.parent.glob(f"{self.log_file_path.stem}_*"):
+            if path.suffix == '.txt':
+                archives.append(path)
+            elif is_compressed(path) and not path.with_suffix('').exists():
+                # 纯文本文件仍存在说明压缩还未完成
+                archives.append(path)
+        # 归档文件名带有时间戳，按文件名倒序即为从新到旧
+        return sorted(archives, key=lambda path: path.name, reverse=True)
+    
+    def compress_pending_archives(self) -> None:
+        """在后台压缩所有尚未压缩的归档，完成后清理旧的归档文件"""
+        pending = [path for path in self._get_archives() if not is_compressed(path)]
+        for path in pending:
+            self.archiver.submit(path, self._cleanup_old_archives)
+        if not pending:
+            self._cleanup_old_archives()
+    
+    def _cleanup_old_archives(self, retention_days: int = 7, max_total_size: Optional[int] = None):
+        """
+        清理旧的归档文件
+        
+        先删除超过保留天数的归档，归档总大小仍超过max_total_size时再从最旧的开始删除
+        
+        Args:
+            retention_days: 保留天数
+            max_total_size: 归档总大小上限（字节），为None时使用max_archive_size
+        """
+        try:
+            max_total_size = self.max_archive_size if max_total_size is None else max_total_size
+            cutoff_time = time.time() - (retention_days * 24 * 60 * 60)
             
             deleted_count = 0
-            for archive_file in archive_files:
-                # 跳过当前日志文件
-                if archive_file.name == self.log_file_path.name:
-                    continue
-                    
-                # 检查文件修改时间
-                file_mtime = archive_file.stat().st_mtime
-                
-                if file_mtime < cutoff_time:
-                    # 删除过期的归档文件
-                    archive_file.unlink()
-                    deleted_count += 1
-                    logger.debug(f"删除过期归档文件: {archive_file.name}")
+            with self._lock:
+                total_size = 0
+                over_limit = False
+                # 从新到旧累计大小，超出上限后更旧的归档全部删除
+                for archive_file in self._get_archives():
+                    stat = archive_file.stat()
+                    over_limit = over_limit or total_size + stat.st_size > max_total_size
+                    if over_limit or stat.st_mtime < cutoff_time:
+                        remove_archive(archive_file)
+                        deleted_count += 1
+                        logger.debug(f"删除旧的归档文件: {archive_file.name}")
+                    else:
+                        total_size += stat.st_size
             
             if deleted_count > 0:
-                logger.info(f"清理了 {deleted_count} 个过期归档文件（保留最近 {retention_days} 天）")
+                logger.info(f"清理了 {deleted_count} 个旧的归档文件（保留最近 {retention_days} 天，"
+                            f"总大小不超过 {max_total_size / (1024 * 1024):.1f} MB）")
                 
         except Exception as e:
             logger.error(f"清理归档文件失败: {str(e)}")
     
     def save_log(self, log_line: str) -> bool:
-        """保存单行日志到文件"""
+        """
+        保存单行日志到文件
+        
+        日志只加入写入队列，由写入线程批量写入，队列已满时丢弃并返回False
+        """
         try:
             timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
             formatted_line = f"[{timestamp}] {log_line}\n"
-            
-            # 追加写入日志文件
-            with open(self.log_file_path, 'a', encoding='utf-8') as f:
-                f.write(formatted_line)
-            
-            # 检查日志文件大小，如果超过限制则截断
-            self._truncate_log_file()
-            return True
+            return self.writer.submit(formatted_line)
             
         except Exception as e:
             logger.error(f"保存日志失败: {str(e)}")
             return False
     
-    def load_logs(self) -> List[str]:
-        """从文件加载所有日志"""
-        try:
-            if not self.log_file_path.exists():
-                return []
+    def _write_batch(self, lines: List[str], fsync: bool) -> None:
+        """在写入线程中把一批日志写入当前分段，写满时轮转"""
+        with self._lock:
+            start = 0
+            while start < len(lines):
+                f = self._open()
+                if self._line_count >= self.max_log_lines:
+                    # 当前分段已超过上限（例如上限被调小），先轮转
+                    self._rotate()
+                    f = self._open()
+                count = max(1, min(len(lines) - start, self.max_log_lines - self._line_count))
+                f.write(''.join(lines[start:start + count]))
+                self._line_count += count
+                start += count
+                
+                # 当前分段写满后轮转
+                if self._line_count >= self.max_log_lines:
+                    self._rotate()
             
-            with open(self.log_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            if self._file is not None:
+                self._file.flush()
+                if fsync:
+                    os.fsync(self._file.fileno())
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等待写入队列中的日志全部写入磁盘"""
+        return self.writer.flush(timeout)
+    
+    def close(self) -> None:
+        """写入剩余日志并关闭日志文件"""
+        self.writer.close()
+        with self._lock:
+            self._close()
+    
+    def get_writer_stats(self) -> Dict[str, int]:
+        """获取日志写入统计信息"""
+        return self.writer.get_stats()
+    
+    def _get_log_sources(self) -> List[Path]:
+        """按从新到旧的顺序列出日志文件：当前分段、上一个分段、清空日志之后的归档文件"""
+        sources = [path for path in (self.log_file_path, self.previous_log_path) if path.exists()]
+        cleared = self._get_cleared_stamp()
+        return sources + [path for path in self._get_archives() if path.name.split('.', 1)[0] > cleared]
+    
+    def _resolve_cursor(self, cursor: Dict[str, Any], sources: List[Path]) -> Optional[int]:
+        """
+        找到游标所在的日志文件
+        
+        当前分段轮转后会被重命名为上一个分段，归档时上一个分段会被重命名为归档文件，
+        归档文件之后还会被压缩，所以用inode重新定位游标指向的文件
+        
+        Returns:
+            Optional[int]: 文件在sources中的下标，文件已被删除时返回None
+        """
+        for index, path in enumerate(sources):
+            try:
+                if path.stat().st_ino == cursor.get('inode'):
+                    return index
+                # 归档被压缩后解压后的偏移不变，游标可以继续使用
+                if is_compressed(path) and (open_archive(path).source or [None, None])[1] == cursor.get('inode'):
+                    return index
+            except OSError:
+                continue
+        return None
+    
+    def load_logs_page(self, cursor: Optional[Dict[str, Any]] = None,
+                       limit: Optional[int] = None) -> Tuple[List[str], Optional[Dict[str, Any]]]:
+        """
+        从新到旧分页加载日志
+        
+        Args:
+            cursor: 上一页返回的游标，为None时从最新的日志开始
+            limit: 最多加载的行数，默认为max_log_lines
             
-            # 返回最后max_log_lines行日志
-            return [line.strip() for line in lines[-self.max_log_lines:]]
+        Returns:
+            Tuple[List[str], Optional[Dict[str, Any]]]: (按时间顺序排列的日志行, 继续向前翻页的游标)，
+            所有日志都已加载时游标为None
+        """
+        limit = limit or self.max_log_lines
+        try:
+            if cursor is None:
+                self.writer.flush()
+            
+            with self._lock:
+                sources = self._get_log_sources()
+                if cursor is None:
+                    index, end = 0, None
+                else:
+                    index, end = self._resolve_cursor(cursor, sources), cursor.get('offset')
+                    if index is None:
+                        logger.warning(f"日志文件已不存在，无法继续加载: {cursor.get('path')}")
+                        return [], None
+                
+                lines: List[str] = []
+                next_cursor = None
+                while index < len(sources) and len(lines) < limit:
+                    path = sources[index]
+                    if is_compressed(path):
+                        # 压缩归档只解压需要的块
+                        raw_lines, start = open_archive(path).tail(limit - len(lines), end)
+                        page = [line.decode('utf-8', errors='replace').strip() for line in raw_lines]
+                    else:
+                        page, start = tail_lines(path, limit - len(lines), end)
+                    lines[:0] = page
+                    if start > 0:
+                        next_cursor = {'path': str(path), 'inode': path.stat().st_ino, 'offset': start}
+                        break
+                    # 当前文件已读到开头，继续读取更早的文件
+                    index += 1
+                    end = None
+                    next_cursor = None
+                
+                if next_cursor is None and index < len(sources):
+                    path = sources[index]
+                    next_cursor = {'path': str(path), 'inode': path.stat().st_ino, 'offset': None}
+                
+                return lines, next_cursor
             
         except Exception as e:
             logger.error(f"加载日志失败: {str(e)}")
-            return []
+            return [], None
+    
+    def load_logs(self) -> List[str]:
+        """从文件末尾向前加载最近max_log_lines行日志"""
+        lines, _ = self.load_logs_page(None, self.max_log_lines)
+        return lines
     
     def clear_logs(self) -> bool:
-        """清空日志文件"""
+        """清空日志文件，已有的归档保留到过期，但不再出现在日志页面和搜索中"""
         try:
-            if self.log_file_path.exists():
-                self.log_file_path.unlink()
+            self.writer.flush()
+            with self._lock:
+                self._close()
+                for path in (self.previous_log_path, self.log_file_path):
+                    if path.exists():
+                        path.unlink()
+                self._line_count = 0
+                self.cleared_marker_path.write_text(self._archive_stamp(), encoding='utf-8')
             return True
             
         except Exception as e:
             logger.error(f"清空日志失败: {str(e)}")
             return False
-    
-    def _truncate_log_file(self):
-        """截断日志文件，保持最大行数限制"""
-        try:
-            if not self.log_file_path.exists():
-                return
-            
-            with open(self.log_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            if len(lines) > self.max_log_lines:
-                # 保留最后max_log_lines行
-                truncated_lines = lines[-self.max_log_lines:]
-                
-                with open(self.log_file_path, 'w', encoding='utf-8') as f:
-                    f.writelines(truncated_lines)
-                    
-        except Exception as e:
-            logger.error(f"截断日志文件失败: {str(e)}")
 
 
 # 创建全局日志管理器实例
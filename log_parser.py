@@ -0,0 +1,357 @@
+"""
+日志解析模块
+负责过滤核心输出中的ANSI转义序列并识别日志等级，所有正则表达式只在导入时编译一次
+"""
+
+import csv
+import io
+import json
+import re
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+
+# 匹配常见的ANSI转义序列：颜色代码(m)、光标移动(A-H, J-T)、光标定位(f)、清除行(K)
+ANSI_ESCAPE_PATTERN = re.compile(r'\x1b\[[0-9;]*[A-HJ-TfKm]')
+
+# 方括号包围的日志等级标识，如 [ERROR]、[FATA]
+BRACKET_LEVEL_PATTERN = re.compile(r'\[(ERROR|WARNING|INFO|DEBUG|SUCCESS|FATA)\]', re.IGNORECASE)
+
+# 没有等级标识时使用的关键词，使用前瞻断言以便找到相互重叠的关键词
+KEYWORD_LEVEL_PATTERN = re.compile(
+    r'(?=(?P<error>error|failed|failure|exception|fatal)'
+    r'|(?P<warning>warning|warn|caution)'
+    r'|(?P<success>success|completed|finished|done|ready)'
+    r'|(?P<debug>debug|trace))',
+    re.IGNORECASE
+)
+
+# 行首的时间戳，兼容日志文件中由log_manager添加的 [YYYY-mm-dd HH:MM:SS] 前缀
+TIMESTAMP_PATTERN = re.compile(r'^\[?(\d{4}[-/]\d{2}[-/]\d{2})[ T](\d{2}:\d{2}:\d{2})(?:[.,]\d+)?\]?\s*')
+
+# 行首的方括号等级标识及其后可选的方括号组件名，如 [INFO] [downloader]
+HEAD_LEVEL_PATTERN = re.compile(r'^\[(?:ERROR|WARNING|INFO|DEBUG|SUCCESS|FATA)\]\s*(?:\[([^\]\s]{1,32})\]\s*)?', re.IGNORECASE)
+
+# 任务ID，如 task_id=abc、task-id: 12、task=abc、task #5；没有分隔符时只接受以数字开头的ID
+TASK_ID_PATTERN = re.compile(
+    r'\btask[_ -]?id\s*[=:#]?\s*([\w-]+)'
+    r'|\btask\s*[=:#]\s*([\w-]+)'
+    r'|\btask\s+#?(\d[\w-]*)',
+    re.IGNORECASE
+)
+
+# 同一行出现多个等级标识时的优先级，数值越小优先级越高
+BRACKET_LEVEL_PRIORITY = {'error': 0, 'warning': 1, 'info': 2, 'debug': 3, 'success': 4, 'fata': 5}
+KEYWORD_LEVEL_PRIORITY = {'error': 0, 'warning': 1, 'success': 2, 'debug': 3}
+
+
+def strip_ansi(text: str) -> str:
+    """
+    过滤ANSI转义序列（控制台颜色代码）
+
+    Args:
+        text: 包含ANSI转义序列的文本
+
+    Returns:
+        str: 过滤后的干净文本
+    """
+    return ANSI_ESCAPE_PATTERN.sub('', text).strip()
+
+
+def classify_level(text: str) -> str:
+    """
+    识别日志等级
+
+    优先使用方括号包围的等级标识，没有时根据关键词判断，默认为info
+
+    Args:
+        text: 日志文本
+
+    Returns:
+        str: 日志等级对应的CSS类名
+    """
+    levels = BRACKET_LEVEL_PATTERN.findall(text)
+    if levels:
+        return min((level.lower() for level in levels), key=BRACKET_LEVEL_PRIORITY.__getitem__)
+
+    best = None
+    for match in KEYWORD_LEVEL_PATTERN.finditer(text):
+        level = match.lastgroup
+        if best is None or KEYWORD_LEVEL_PRIORITY[level] < KEYWORD_LEVEL_PRIORITY[best]:
+            best = level
+            if level == 'error':
+                break
+
+    return best or 'info'
+
+
+def parse_line(line: str) -> Tuple[str, str]:
+    """
+    解析一行核心输出
+
+    Args:
+        line: 原始输出行
+
+    Returns:
+        Tuple[str, str]: (过滤后的文本, 日志等级)
+    """
+    clean_line = ANSI_ESCAPE_PATTERN.sub('', line).strip()
+    return clean_line, classify_level(clean_line)
+
+
+def parse_lines(lines: List[str]) -> List[Tuple[str, str]]:
+    """
+    批量解析核心输出
+
+    Args:
+        lines: 原始输出行列表
+
+    Returns:
+        List[Tuple[str, str]]: 每行的(过滤后的文本, 日志等级)
+    """
+    return [parse_line(line) for line in lines]
+
+
+class LogRecord:
+    """一行核心日志解析后的结构化记录"""
+
+    __slots__ = ('timestamp', 'level', 'component', 'task_id', 'message', 'raw')
+
+    def __init__(self, timestamp: float, level: str, component: Optional[str],
+                 task_id: Optional[str], message: str, raw: str):
+        self.timestamp = timestamp
+        self.level = level
+        self.component = component
+        self.task_id = task_id
+        self.message = message
+        self.raw = raw
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"LogRecord({self.level!r}, {self.message!r})"
+
+
+def parse_record(line: str, timestamp: Optional[float] = None) -> LogRecord:
+    """
+    把一行核心输出解析为结构化记录
+
+    Args:
+        line: 原始输出行，可以包含ANSI转义序列和日志文件的时间戳前缀
+        timestamp: 行内没有时间戳时使用的时间，为None时使用当前时间
+
+    Returns:
+        LogRecord: 解析后的记录，raw为过滤ANSI转义序列后的文本
+    """
+    clean_line, level = parse_line(line)
+    message = clean_line
+
+    match = TIMESTAMP_PATTERN.match(message)
+    if match:
+        try:
+            parsed = datetime.strptime(f"{match.group(1).replace('/', '-')} {match.group(2)}", '%Y-%m-%d %H:%M:%S')
+            timestamp = parsed.timestamp()
+            message = message[match.end():]
+        except ValueError:
+            pass
+    if timestamp is None:
+        timestamp = time.time()
+
+    component = None
+    match = HEAD_LEVEL_PATTERN.match(message)
+    if match:
+        component = match.group(1)
+        message = message[match.end():]
+
+    match = TASK_ID_PATTERN.search(message)
+    task_id = next(group for group in match.groups() if group) if match else None
+
+    return LogRecord(timestamp, level, component, task_id, message, clean_line)
+
+
+class LogRecordBuffer:
+    """
+    有界的日志记录缓冲区
+
+    按等级的计数随追加和淘汰增量维护，统计和筛选都不需要重新解析文本
+    """
+
+    def __init__(self, max_records: int = 5000):
+        self.max_records = max_records
+        self._records: deque = deque()
+        self._level_counts: Counter = Counter()
+
+    def append(self, record: LogRecord) -> None:
+        """追加一条记录，超出容量时淘汰最旧的记录"""
+        if len(self._records) >= self.max_records:
+            evicted = self._records.popleft()
+            self._level_counts[evicted.level] -= 1
+        self._records.append(record)
+        self._level_counts[record.level] += 1
+
+    def extend(self, records: Iterable[LogRecord]) -> None:
+        """批量追加记录"""
+        for record in records:
+            self.append(record)
+
+    def clear(self) -> None:
+        """清空缓冲区"""
+        self._records.clear()
+        self._level_counts.clear()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[LogRecord]:
+        return iter(self._records)
+
+    def filter(self, level: Optional[str] = None, component: Optional[str] = None,
+               task_id: Optional[str] = None, since: Optional[float] = None,
+               until: Optional[float] = None, keyword: Optional[str] = None) -> List[LogRecord]:
+        """
+        按条件筛选记录
+
+        Args:
+            level: 日志等级
+            component: 组件名
+            task_id: 任务ID
+            since: 起始时间戳（包含）
+            until: 结束时间戳（不包含）
+            keyword: 消息中包含的关键词（不区分大小写）
+
+        Returns:
+            List[LogRecord]: 符合所有条件的记录，按时间顺序
+        """
+        keyword = keyword.lower() if keyword else None
+        results = []
+        for record in self._records:
+            if level is not None and record.level != level:
+                continue
+            if component is not None and record.component != component:
+                continue
+            if task_id is not None and record.task_id != task_id:
+                continue
+            if since is not None and record.timestamp < since:
+                continue
+            if until is not None and record.timestamp >= until:
+                continue
+            if keyword is not None and keyword not in record.message.lower():
+                continue
+            results.append(record)
+        return results
+
+    def count_by_level(self) -> Dict[str, int]:
+        """获取各等级的记录数"""
+        return {level: count for level, count in self._level_counts.items() if count > 0}
+
+    def export(self, records: Optional[Iterable[LogRecord]] = None, fmt: str = 'text') -> str:
+        """
+        导出记录
+
+        Args:
+            records: 要导出的记录，为None时导出全部
+            fmt: 导出格式，text / json / csv
+
+        Returns:
+            str: 导出的文本
+        """
+        records = self._records if records is None else records
+
+        if fmt == 'json':
+            return json.dumps([record.to_dict() for record in records], ensure_ascii=False)
+
+        if fmt == 'csv':
+            output = io.StringIO()
+            writer = csv.writer(output)
+            writer.writerow(LogRecord.__slots__)
+            for record in records:
+                writer.writerow([getattr(record, name) for name in LogRecord.__slots__])
+            return output.getvalue()
+
+        if fmt == 'text':
+            return ''.join(
+                f"[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record.timestamp))}] "
+                f"[{record.level.upper()}] {record.message}\n"
+                for record in records
+            )
+
+        raise ValueError(f"不支持的导出格式: {fmt}")
+
+
+if __name__ == "__main__":
+    # 微基准测试：对比逐行编译正则的旧实现与预编译实现的吞吐量
+    import random
+
+    def legacy_filter_ansi_escape(text: str) -> str:
+        import re
+        ansi_escape_patterns = [
+            r'\x1b\[[0-9;]*m',
+            r'\x1b\[[0-9;]*[A-HJ-ST]',
+            r'\x1b\[[0-9;]*[f]',
+            r'\x1b\[[0-9;]*[K]',
+        ]
+        clean_text = text
+        for pattern in ansi_escape_patterns:
+            ansi_escape = re.compile(pattern)
+            clean_text = ansi_escape.sub('', clean_text)
+        return clean_text.strip()
+
+    def legacy_get_log_level(text: str) -> str:
+        import re
+        log_levels = ['ERROR', 'WARNING', 'INFO', 'DEBUG', 'SUCCESS', 'FATA']
+        for level in log_levels:
+            pattern = r'\[(' + re.escape(level) + r')\]'
+            if re.search(pattern, text, re.IGNORECASE):
+                return level.lower()
+        text_lower = text.lower()
+        if any(keyword in text_lower for keyword in ['error', 'failed', 'failure', 'exception', 'fatal']):
+            return 'error'
+        elif any(keyword in text_lower for keyword in ['warning', 'warn', 'caution']):
+            return 'warning'
+        elif any(keyword in text_lower for keyword in ['success', 'completed', 'finished', 'done', 'ready']):
+            return 'success'
+        elif any(keyword in text_lower for keyword in ['debug', 'trace']):
+            return 'debug'
+        return 'info'
+
+    templates = [
+        '\x1b[36m2024-05-01 12:00:{s:02d}\x1b[0m \x1b[32m[INFO]\x1b[0m [downloader] task={n} 正在下载分段 {n}/64',
+        '\x1b[33m[WARNING]\x1b[0m [network] retry {n} for mirror cdn-{n}.example.com',
+        '\x1b[31m[ERROR]\x1b[0m [merger] ffmpeg exited with code {n}',
+        '[FATA] [core] unable to bind port {n}',
+        'task {n} completed, 100% done',
+        'progress {n}% speed 12.3MB/s',
+        '\x1b[2K\x1b[1Gdownloading part {n} ... \x1b[1;32mOK\x1b[0m',
+        'connection reset by peer, failed to read header {n}',
+    ]
+    random.seed(0)
+    sample = [random.choice(templates).format(n=i, s=i % 60) for i in range(50000)]
+
+    # 校验两种实现结果一致
+    for raw in sample[:5000]:
+        legacy_clean = legacy_filter_ansi_escape(raw)
+        assert parse_line(raw) == (legacy_clean, legacy_get_log_level(legacy_clean)), raw
+
+    start = time.perf_counter()
+    for raw in sample:
+        legacy_clean = legacy_filter_ansi_escape(raw)
+        legacy_get_log_level(legacy_clean)
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for raw in sample:
+        parse_line(raw)
+    line_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parse_lines(sample)
+    batch_elapsed = time.perf_counter() - start
+
+    print(f"样本行数: {len(sample)}")
+    print(f"旧实现:           {len(sample) / legacy_elapsed:>12,.0f} 行/秒")
+    print(f"parse_line:       {len(sample) / line_elapsed:>12,.0f} 行/秒")
+    print(f"parse_lines批量:  {len(sample) / batch_elapsed:>12,.0f} 行/秒")
@@ -0,0 +1,239 @@
+"""
+核心进程监督模块
+通过PID跟踪核心进程，由等待线程得知进程退出，避免反复扫描系统进程表
+"""
+
+import asyncio
+import platform
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from loguru import logger
+
+
+class CoreProcessSupervisor:
+    """
+    核心进程监督器
+
+    启动时扫描一次系统进程表找出已存在的同名核心进程，之后只跟踪已知的PID：
+    自己启动的子进程和扫描到的外部进程各有一个等待线程，进程退出时推送状态变化
+    """
+
+    def __init__(self):
+        self.state: Dict[str, Any] = {
+            'pid': None,
+            'running': False,
+            'return_code': None,
+            'external_pids': [],
+            'scanned': False,
+            'last_change': None
+        }
+        self._lock = threading.Lock()
+        self._subscribers: List[Tuple[Callable[[Dict[str, Any]], Any], Optional[asyncio.AbstractEventLoop]]] = []
+
+    def initialize(self, core_filename: str) -> None:
+        """在后台线程中完成启动时的进程扫描"""
+        thread = threading.Thread(target=self.scan_external, args=(core_filename,), daemon=True)
+        thread.start()
+
+    def scan_external(self, core_filename: str) -> List[int]:
+        """
+        扫描系统进程表，记录并跟踪已存在的同名核心进程
+
+        Args:
+            core_filename: 核心文件名
+
+        Returns:
+            List[int]: 扫描到的外部进程PID列表，无法获取PID时为空
+        """
+        try:
+            import psutil
+
+            process_name = Path(core_filename).stem
+            own_pid = self.state['pid']
+            found = []
+            for proc in psutil.process_iter(['pid', 'name', 'exe']):
+                try:
+                    # 检查进程名或可执行文件路径是否匹配
+                    if proc.info['pid'] != own_pid and (
+                            (proc.info['name'] and process_name.lower() in proc.info['name'].lower()) or
+                            (proc.info['exe'] and core_filename.lower() in proc.info['exe'].lower())):
+                        found.append(proc)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+
+            with self._lock:
+                tracked = set(self.state['external_pids'])
+                self.state['external_pids'] = [proc.pid for proc in found]
+                self.state['scanned'] = True
+
+            # 只为新发现的进程启动等待线程
+            for proc in found:
+                if proc.pid in tracked:
+                    continue
+                logger.warning(f"检测到已有核心进程在运行: PID {proc.pid}")
+                thread = threading.Thread(target=self._wait_external, args=(proc,), daemon=True)
+                thread.start()
+
+        except ImportError:
+            logger.warning("psutil模块不可用，使用备用进程检查方法")
+            running = self._scan_external_fallback(core_filename)
+            with self._lock:
+                # 备用方法无法获取PID，用-1表示存在无法跟踪的外部进程
+                self.state['external_pids'] = [-1] if running else []
+                self.state['scanned'] = True
+
+        except Exception as e:
+            logger.error(f"扫描核心进程失败: {str(e)}")
+            with self._lock:
+                self.state['scanned'] = True
+
+        self._notify()
+        return list(self.state['external_pids'])
+
+    def _scan_external_fallback(self, core_filename: str) -> bool:
+        """备用方法：使用系统命令检查是否有同名核心进程在运行"""
+        try:
+            system = platform.system()
+
+            if system == "Windows":
+                result = subprocess.run(['tasklist', '/FI', f'IMAGENAME eq {core_filename}'],
+                                        capture_output=True, text=True, timeout=10)
+                return core_filename in result.stdout
+            elif system in ["Linux", "Darwin"]:
+                result = subprocess.run(['ps', 'aux'], capture_output=True, text=True, timeout=10)
+                return core_filename in result.stdout
+            else:
+                logger.warning(f"不支持的平台: {system}")
+                return False
+
+        except Exception as e:
+            logger.error(f"备用进程检查方法失败: {str(e)}")
+            return False
+
+    def _wait_external(self, proc) -> None:
+        """等待线程：等待外部核心进程退出"""
+        try:
+            proc.wait()
+        except Exception:
+            pass
+
+        with self._lock:
+            if proc.pid in self.state['external_pids']:
+                self.state['external_pids'].remove(proc.pid)
+        logger.info(f"外部核心进程已退出: PID {proc.pid}")
+        self._notify()
+
+    def attach(self, process: subprocess.Popen) -> None:
+        """
+        跟踪由启动器创建的核心子进程
+
+        Args:
+            process: 核心子进程
+        """
+        self.attach_pid(process.pid)
+
+        thread = threading.Thread(target=self._wait_child, args=(process,), daemon=True)
+        thread.start()
+
+    def attach_pid(self, pid: int) -> None:
+        """
+        跟踪由调用者自行等待退出的核心子进程（如asyncio子进程），
+        进程退出后由调用者调用mark_exited
+
+        Args:
+            pid: 核心子进程PID
+        """
+        with self._lock:
+            self.state['pid'] = pid
+            self.state['running'] = True
+            self.state['return_code'] = None
+        self._notify()
+
+    def _wait_child(self, process: subprocess.Popen) -> None:
+        """等待线程：等待核心子进程退出"""
+        try:
+            return_code = process.wait()
+        except Exception as e:
+            logger.error(f"等待核心进程退出失败: {str(e)}")
+            return_code = process.poll()
+        self.mark_exited(process.pid, return_code)
+
+    def mark_exited(self, pid: int, return_code: Optional[int]) -> None:
+        """
+        记录核心子进程已退出
+
+        Args:
+            pid: 进程PID
+            return_code: 退出码
+        """
+        with self._lock:
+            if self.state['pid'] != pid:
+                return
+            self.state['running'] = False
+            self.state['return_code'] = return_code
+        logger.info(f"核心进程已退出: PID {pid}, 退出码 {return_code}")
+        self._notify()
+
+    def is_running(self) -> bool:
+        """启动器创建的核心子进程是否正在运行"""
+        return self.state['running']
+
+    def has_external_processes(self) -> bool:
+        """是否有不是由启动器创建的同名核心进程在运行"""
+        return len(self.state['external_pids']) > 0
+
+    def get_process_status(self) -> str:
+        """获取核心子进程状态描述"""
+        if self.state['pid'] is None:
+            return 'unknown'
+        if self.state['running']:
+            return 'running'
+        return f"exited_with_code_{self.state['return_code']}"
+
+    def get_state(self) -> Dict[str, Any]:
+        """获取当前状态的副本"""
+        with self._lock:
+            state = self.state.copy()
+            state['external_pids'] = list(state['external_pids'])
+            return state
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], Any],
+                  loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """
+        订阅进程状态变化
+
+        状态变化可能发生在等待线程中，指定事件循环时回调会通过
+        call_soon_threadsafe在该事件循环中执行
+
+        Args:
+            callback: 回调函数，接收状态字典
+            loop: 执行回调的事件循环，为None时在通知线程中直接执行
+        """
+        self._subscribers.append((callback, loop))
+
+    def unsubscribe(self, callback: Callable[[Dict[str, Any]], Any]) -> None:
+        """取消订阅进程状态变化"""
+        self._subscribers = [(cb, loop) for cb, loop in self._subscribers if cb != callback]
+
+    def _notify(self) -> None:
+        """通知所有订阅者"""
+        with self._lock:
+            self.state['last_change'] = time.time()
+        state = self.get_state()
+
+        for callback, loop in list(self._subscribers):
+            try:
+                if loop is not None:
+                    if not loop.is_closed():
+                        loop.call_soon_threadsafe(callback, state)
+                else:
+                    callback(state)
+            except Exception as e:
+                logger.error(f"进程状态回调执行失败: {str(e)}")
+
+
+# 创建全局核心进程监督器实例
+process_supervisor = CoreProcessSupervisor()
@@ -9,6 +9,7 @@ from loguru import logger
 from ui_home import create_home_page
 from ui_settings import create_settings_page
 from ui_log import create_log_page
+from ui_tasks import create_tasks_page
 
 
 class Router:
@@ -23,6 +24,12 @@ class Router:
                 'component': create_home_page,
                 'description': '核心状态监控和文件管理'
             },
+            '/tasks': {
+                'name': '任务',
+                'icon': 'download',
+                'component': create_tasks_page,
+                'description': '下载任务和进度'
+            },
             '/log': {
                 'name': '日志',
                 'icon': 'list_alt',
@@ -109,6 +116,11 @@ class Router:
             """传统设置页面路由"""
             create_settings_page()
         
+        @ui.page('/legacy/tasks')
+        def legacy_tasks():
+            """传统任务页面路由"""
+            create_tasks_page()
+        
         @ui.page('/legacy/log')
         def legacy_log():
             """传统日志页面路由"""
@@ -0,0 +1,140 @@
+"""
+任务进度订阅模块
+负责在内存中维护下载任务表，并把任务状态的变化推送给所有页面
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+from core_manager import CoreManager, core_manager
+
+
+class TaskState:
+    """下载任务的状态"""
+
+    __slots__ = ('task_id', 'title', 'state', 'downloaded', 'total', 'speed', 'updated_at')
+
+    def __init__(self, task_id: str, title: str = '', state: str = 'unknown', downloaded: int = 0,
+                 total: int = 0, speed: float = 0.0, updated_at: Optional[float] = None):
+        self.task_id = task_id
+        self.title = title
+        self.state = state
+        self.downloaded = downloaded
+        self.total = total
+        self.speed = speed
+        self.updated_at = updated_at if updated_at is not None else time.time()
+
+    @classmethod
+    def from_info(cls, task_id: str, info: Dict[str, Any]) -> 'TaskState':
+        """从CoreManager.download_tasks中的任务信息创建"""
+        return cls(
+            task_id=task_id,
+            title=info.get('filename', ''),
+            state=info.get('status', 'unknown'),
+            downloaded=int(info.get('downloaded_size', 0)),
+            total=int(info.get('total_size', 0)),
+            speed=float(info.get('speed', 0.0))
+        )
+
+    @property
+    def progress(self) -> float:
+        """下载进度百分比"""
+        return self.downloaded / self.total * 100 if self.total > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"TaskState({self.task_id!r}, {self.state!r}, {self.downloaded}/{self.total})"
+
+
+class TaskProgressService:
+    """
+    任务进度订阅服务
+
+    监听CoreManager的下载任务，任务开始、每次进度更新和结束时更新任务表，
+    无论打开多少个页面，任务状态只在这里汇总一次。
+    只跟踪启动器自身的下载（如核心文件），核心的下载任务不经过这里。
+    订阅者收到的是增量 {'updated': List[TaskState], 'removed': List[str]}，回调在事件循环中执行
+    """
+
+    def __init__(self, manager: CoreManager):
+        self.manager = manager
+        self.tasks: Dict[str, TaskState] = {}
+        self.state: Dict[str, Any] = {
+            'running': False,
+            'last_update': None
+        }
+        self._subscribers: List[Callable[[Dict[str, Any]], Any]] = []
+
+    def start(self) -> None:
+        """开始监听下载任务，并载入已登记的任务"""
+        if self.state['running']:
+            return
+        self.state['running'] = True
+        self.manager.add_task_listener(self._on_task)
+        self._apply([TaskState.from_info(task_id, info)
+                     for task_id, info in self.manager.get_all_tasks().items()], [])
+        logger.info("任务进度订阅已启动")
+
+    def stop(self) -> None:
+        """停止监听下载任务"""
+        self.manager.remove_task_listener(self._on_task)
+        self.state['running'] = False
+
+    def _on_task(self, task_id: str, info: Dict[str, Any]) -> None:
+        """下载任务状态变化，同时移除已被下载任务登记表淘汰的任务"""
+        removed = [known for known in self.tasks if known not in self.manager.download_tasks]
+        self._apply([TaskState.from_info(task_id, info)], removed)
+
+    def _apply(self, changed: List[TaskState], removed: List[str]) -> None:
+        """更新任务表并把增量推送给订阅者"""
+        for task in changed:
+            self.tasks[task.task_id] = task
+        removed = [task_id for task_id in removed if self.tasks.pop(task_id, None) is not None]
+
+        if not changed and not removed:
+            return
+
+        self.state['last_update'] = time.time()
+        delta = {'updated': changed, 'removed': removed}
+        for callback in list(self._subscribers):
+            try:
+                result = callback(delta)
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                logger.error(f"任务进度回调执行失败: {str(e)}")
+
+    def get_tasks(self) -> List[TaskState]:
+        """获取当前任务表的快照，订阅者在订阅时用它完成首次渲染"""
+        return list(self.tasks.values())
+
+    def get_state(self) -> Dict[str, Any]:
+        """获取订阅状态"""
+        state = self.state.copy()
+        state['task_count'] = len(self.tasks)
+        state['subscribers'] = len(self._subscribers)
+        return state
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], Any]) -> None:
+        """
+        订阅任务变化
+
+        Args:
+            callback: 回调函数，接收 {'updated': List[TaskState], 'removed': List[str]}
+        """
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Dict[str, Any]], Any]) -> None:
+        """取消订阅任务变化"""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+
+# 创建全局任务进度订阅实例
+task_progress = TaskProgressService(core_manager)
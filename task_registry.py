@@ -0,0 +1,161 @@
+"""
+下载任务登记模块
+负责保存启动器自身下载任务的状态，限制保留的已结束任务数量和时间
+"""
+
+import itertools
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+
+# 已结束的下载任务状态
+FINISHED_STATUSES = {'completed', 'failed', 'cancelled'}
+
+
+class _ReadOnlyTasks(Mapping):
+    """任务登记表的只读视图，读取到的任务信息同样是只读的"""
+
+    __slots__ = ('_tasks',)
+
+    def __init__(self, tasks: Mapping[str, Dict[str, Any]]):
+        self._tasks = tasks
+
+    def __getitem__(self, task_id: str) -> Mapping[str, Any]:
+        return MappingProxyType(self._tasks[task_id])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tasks)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+
+class TaskRegistry:
+    """
+    有界的下载任务登记表
+
+    任务ID由递增计数器生成，同一秒内开始的下载也不会冲突。进行中的任务总是保留；
+    已结束的任务按结束顺序排列，超过max_finished个或结束超过max_age秒后从最早结束的开始移除。
+    读取全部任务时返回只读视图，不复制字典，视图中的每个任务信息也只能读取
+    """
+
+    def __init__(self, max_finished: int = 100, max_age: float = 3600.0):
+        """
+        Args:
+            max_finished: 最多保留的已结束任务数
+            max_age: 已结束任务保留的秒数
+        """
+        self.max_finished = max_finished
+        self.max_age = max_age
+        # 按登记顺序排列，任务结束时移到末尾
+        self._tasks: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        # 已结束任务的结束时间，按结束顺序排列
+        self._finished: 'OrderedDict[str, float]' = OrderedDict()
+        self._ids = itertools.count(1)
+        self._view = _ReadOnlyTasks(self._tasks)
+
+    def new_id(self, name: str) -> str:
+        """
+        生成唯一的任务ID
+
+        Args:
+            name: 任务名称，通常为文件名
+
+        Returns:
+            str: 形如 "文件名_序号" 的任务ID
+        """
+        return f"{name}_{next(self._ids)}"
+
+    def add(self, task_id: str, info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        登记一个任务
+
+        Args:
+            task_id: 任务ID
+            info: 任务信息字典，之后可以直接修改
+
+        Returns:
+            Dict[str, Any]: 登记的任务信息
+        """
+        info.setdefault('created_at', time.time())
+        self._tasks[task_id] = info
+        self._finished.pop(task_id, None)
+        if info.get('status') in FINISHED_STATUSES:
+            self.finish(task_id, info['status'])
+        return info
+
+    def finish(self, task_id: str, status: str, **fields) -> None:
+        """
+        把任务标记为已结束，并移除超出数量或时间的已结束任务
+
+        Args:
+            task_id: 任务ID
+            status: 结束状态，completed / failed / cancelled
+            **fields: 同时更新的其他字段
+        """
+        info = self._tasks.get(task_id)
+        if info is None:
+            return
+        info.update(fields)
+        info['status'] = status
+
+        now = time.time()
+        info['finished_at'] = now
+        self._tasks.move_to_end(task_id)
+        self._finished[task_id] = now
+        self._finished.move_to_end(task_id)
+        self.evict(now)
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """
+        移除超出数量或时间的已结束任务
+
+        Returns:
+            int: 移除的任务数
+        """
+        now = now if now is not None else time.time()
+        removed = 0
+        while self._finished:
+            task_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and now - finished_at < self.max_age:
+                break
+            del self._finished[task_id]
+            self._tasks.pop(task_id, None)
+            removed += 1
+        return removed
+
+    def remove(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """删除一个任务，返回其信息"""
+        self._finished.pop(task_id, None)
+        return self._tasks.pop(task_id, None)
+
+    def get(self, task_id: str, default: Any = None) -> Any:
+        return self._tasks.get(task_id, default)
+
+    def __getitem__(self, task_id: str) -> Dict[str, Any]:
+        return self._tasks[task_id]
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._tasks
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tasks)
+
+    def active(self) -> Iterator[Dict[str, Any]]:
+        """遍历进行中的任务"""
+        return (info for task_id, info in self._tasks.items() if task_id not in self._finished)
+
+    def view(self) -> Mapping[str, Mapping[str, Any]]:
+        """
+        获取全部任务的只读视图
+
+        视图随登记表变化，不复制字典；读取到的任务信息是只读代理，同样随任务更新。
+        需要固定某一时刻的内容时自行复制
+        """
+        self.evict()
+        return self._view
@@ -0,0 +1,236 @@
+"""
+任务表模块
+负责以列式结构在内存中保存下载任务，就地更新进度和下载速度
+"""
+
+import time
+from array import array
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from task_progress import TaskState, task_progress
+
+
+# 任务状态，按下标存储在状态列中
+TASK_STATES = ('unknown', 'queued', 'downloading', 'paused', 'completed', 'failed', 'cancelled')
+STATE_CODES = {state: code for code, state in enumerate(TASK_STATES)}
+
+# 已结束的任务状态，超过保留时间后从任务表中移除
+FINISHED_STATES = {'completed', 'failed', 'cancelled'}
+FINISHED_CODES = {STATE_CODES[state] for state in FINISHED_STATES}
+DOWNLOADING_CODE = STATE_CODES['downloading']
+
+
+class TaskTable:
+    """
+    列式任务表
+
+    每个字段是一列（ID和标题为列表，数值为array），一个任务是各列中相同下标的一行，
+    数千个任务也只占用少量连续内存，更新进度时只改写对应位置的数值。
+    速度直接使用下载进度统计器平滑后的值，这里不再重复平滑。
+    每行记录最后一次变化的序号，页面按自己上次看到的序号取出变化的行，
+    多个页面互不影响；删除行时把最后一行移到空位，列保持紧凑
+    """
+
+    # 检查过期任务的最小间隔（秒）
+    TICK_INTERVAL = 1.0
+    # 保留的删除记录数，页面落后更多时重新获取全部行
+    REMOVED_HISTORY = 4096
+
+    def __init__(self, retention: float = 600.0):
+        """
+        Args:
+            retention: 已结束的任务保留的秒数
+        """
+        self.retention = retention
+        self.ids: List[str] = []
+        self.titles: List[str] = []
+        self.done = array('q')
+        self.total = array('q')
+        self.speed = array('d')
+        self.state = array('B')
+        self.finished_at = array('d')
+        self.seq = array('Q')
+        self._index: Dict[str, int] = {}
+        self._seq = 0
+        # (删除时的序号, 任务ID)
+        self._removed: deque = deque(maxlen=self.REMOVED_HISTORY)
+        # 早于该序号的删除记录已被丢弃
+        self._removed_floor = 0
+        self._last_tick = 0.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._index
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def upsert(self, task: TaskState, now: Optional[float] = None) -> bool:
+        """
+        新增或就地更新一个任务
+
+        Args:
+            task: 任务状态
+            now: 当前时间，为None时使用time.time()
+
+        Returns:
+            bool: 任务是否有变化
+        """
+        now = now if now is not None else time.time()
+        state = STATE_CODES.get(task.state, 0)
+        # 只有下载中的任务有速度
+        speed = task.speed if state == DOWNLOADING_CODE else 0.0
+        row = self._index.get(task.task_id)
+
+        if row is None:
+            self._index[task.task_id] = len(self.ids)
+            self.ids.append(task.task_id)
+            self.titles.append(task.title)
+            self.done.append(task.downloaded)
+            self.total.append(task.total)
+            self.speed.append(speed)
+            self.state.append(state)
+            self.finished_at.append(now if state in FINISHED_CODES else 0.0)
+            self.seq.append(self._next_seq())
+            return True
+
+        changed = (task.downloaded != self.done[row] or task.total != self.total[row]
+                   or state != self.state[row] or task.title != self.titles[row]
+                   or int(speed) != int(self.speed[row]))
+        if not changed:
+            return False
+
+        if state in FINISHED_CODES and self.state[row] not in FINISHED_CODES:
+            self.finished_at[row] = now
+        elif state not in FINISHED_CODES:
+            self.finished_at[row] = 0.0
+        self.titles[row] = task.title
+        self.done[row] = task.downloaded
+        self.total[row] = task.total
+        self.speed[row] = speed
+        self.state[row] = state
+        self.seq[row] = self._next_seq()
+        return True
+
+    def remove(self, task_id: str) -> bool:
+        """
+        删除一个任务
+
+        Returns:
+            bool: 任务是否存在
+        """
+        row = self._index.pop(task_id, None)
+        if row is None:
+            return False
+
+        last = len(self.ids) - 1
+        columns = (self.ids, self.titles, self.done, self.total, self.speed,
+                   self.state, self.finished_at, self.seq)
+        if row != last:
+            for column in columns:
+                column[row] = column[last]
+            self._index[self.ids[row]] = row
+        for column in columns:
+            column.pop()
+
+        if len(self._removed) == self._removed.maxlen:
+            self._removed_floor = self._removed[0][0]
+        self._removed.append((self._next_seq(), task_id))
+        return True
+
+    def apply_delta(self, delta: Dict[str, Any]) -> None:
+        """
+        应用任务进度订阅推送的增量
+
+        被移除的任务中，已结束的保留到过期，未结束的立即删除
+        """
+        now = time.time()
+        for task in delta.get('updated', []):
+            self.upsert(task, now)
+        for task_id in delta.get('removed', []):
+            row = self._index.get(task_id)
+            if row is not None and self.state[row] not in FINISHED_CODES:
+                self.remove(task_id)
+        self.tick(now)
+
+    def tick(self, now: Optional[float] = None) -> int:
+        """
+        删除过期的已结束任务
+
+        Returns:
+            int: 删除的任务数
+        """
+        now = now if now is not None else time.time()
+        if now - self._last_tick < self.TICK_INTERVAL:
+            return 0
+        self._last_tick = now
+
+        expired = []
+        for row, state in enumerate(self.state):
+            if state in FINISHED_CODES and now - self.finished_at[row] >= self.retention:
+                expired.append(self.ids[row])
+
+        for task_id in expired:
+            self.remove(task_id)
+        return len(expired)
+
+    def get_row(self, row: int) -> Dict[str, Any]:
+        """获取一行的字段"""
+        return {
+            'id': self.ids[row],
+            'title': self.titles[row],
+            'state': TASK_STATES[self.state[row]],
+            'done': self.done[row],
+            'total': self.total[row],
+            'speed': self.speed[row]
+        }
+
+    def get_rows(self) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        获取全部行
+
+        Returns:
+            Tuple[int, List[Dict[str, Any]]]: (当前序号, 全部行)
+        """
+        return self._seq, [self.get_row(row) for row in range(len(self.ids))]
+
+    def changes_since(self, seq: int) -> Optional[Tuple[int, List[Dict[str, Any]], List[str]]]:
+        """
+        获取序号seq之后变化的行
+
+        Args:
+            seq: 上次获取时的序号
+
+        Returns:
+            Optional[Tuple[int, List[Dict[str, Any]], List[str]]]: (当前序号, 新增或变化的行, 删除的任务ID)，
+            删除记录已不完整时返回None，调用者需要通过get_rows重新获取全部行
+        """
+        if seq < self._removed_floor:
+            return None
+        if seq >= self._seq:
+            return self._seq, [], []
+
+        changed = [self.get_row(row) for row, row_seq in enumerate(self.seq) if row_seq > seq]
+        # 删除后又重新加入的任务只作为变化的行返回
+        removed = [task_id for removed_seq, task_id in self._removed
+                   if removed_seq > seq and task_id not in self._index]
+        return self._seq, changed, removed
+
+    def count_by_state(self) -> Dict[str, int]:
+        """统计各状态的任务数"""
+        return {TASK_STATES[code]: count for code, count in Counter(self.state).items()}
+
+    def get_total_speed(self) -> float:
+        """所有任务的平滑速度之和"""
+        return sum(self.speed)
+
+
+# 创建全局任务表实例
+task_table = TaskTable()
+
+# 订阅下载任务进度
+task_progress.subscribe(task_table.apply_delta)
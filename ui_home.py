@@ -8,15 +8,13 @@ from pathlib import Path
 from nicegui import ui
 from loguru import logger
 
-from core_manager import CoreManager
+from core_manager import core_manager
 from config_manager import config_manager
 from system_info import system_info
 from utils import create_file_browser_button
-from core_status import update_core_status, get_core_status
-
-# 创建全局实例
-core_manager = CoreManager()
-
+import core_status as core_status_bus
+from core_status import get_core_status
+from core_verifier import core_verifier
 
 def create_home_page():
     """创建主页UI组件"""
@@ -56,72 +54,96 @@ def create_home_page():
     progress_container = ui.column().style('width: 100%; margin-top: 20px')
     
     # 更新核心运行状态显示
-    def update_core_running_display():
-        # 更新全局缓存变量core中的核心状态
-        update_core_status()
+    def update_core_running_display(status=None):
+        # 页面已被销毁时取消订阅
+        if core_running_status.is_deleted:
+            core_status_bus.unsubscribe(update_core_running_display)
+            return
+        
+        # 使用状态总线推送的状态，未提供时读取全局缓存变量core
+        status = status or get_core_status()
         
         # 根据核心运行状态更新显示
-        if get_core_status()['is_running']:
+        if status['is_running']:
             core_running_status.set_text('核心状态: 正在运行')
             core_running_status.style('color: green')
         else:
             core_running_status.set_text('核心状态: 已停止')
             core_running_status.style('color: red')
     
-    # 页面加载时初始化核心运行状态显示
-    ui.timer(0.1, lambda: update_core_running_display(), once=True)
-    
-    # 定期更新核心运行状态显示（每5秒检查一次）
-    ui.timer(5.0, lambda: update_core_running_display())
+    # 页面加载时初始化核心运行状态显示，之后由状态总线推送更新
+    update_core_running_display()
+    core_status_bus.subscribe(update_core_running_display)
     
-    # 检查核心文件状态和hash校验
-    hash_result = core_manager.check_core_hash()
+    # 核心文件提示信息显示区域
+    hint_container = ui.column()
     
-    if not hash_result['exists']:
-        # 文件不存在
-        core_status.set_text(f'选择的核心文件: {core_filename} (未找到)')
-        core_status.style('color: red')
-        hash_status.set_text('状态: 核心文件不存在')
-        hash_status.style('color: red')
+    # 根据后台校验状态更新核心文件状态和hash校验结果显示
+    def render_hash_state(state):
+        # 页面已被销毁时取消订阅
+        if core_status.is_deleted:
+            core_verifier.unsubscribe(render_hash_state)
+            return
         
-        # 核心不存在时显示下载按键
-        ui.label('核心文件未找到，请下载对应版本的核心文件').style('color: orange; margin-top: 10px')
-        
-        # 清空详细信息
+        hash_result = state['result']
+        hint_container.clear()
         details_expansion.clear()
         
-    elif hash_result['valid']:
-        # Hash校验通过
-        core_status.set_text(f'选择的核心文件: {core_filename} (已找到)')
-        core_status.style('color: green')
-        hash_status.set_text('状态: Hash校验通过，文件完整')
-        hash_status.style('color: green')
-        
-        # 显示详细信息
-        details_expansion.clear()
-        with details_expansion:
-            hash_source_text = '（备用）' if hash_result.get('hash_source') == 'backup' else ''
-            ui.label(f'官方Hash{hash_source_text}: {hash_result["official_hash"]}').style('font-family: monospace; font-size: 12px')
-            ui.label(f'本地Hash: {hash_result["local_hash"]}').style('font-family: monospace; font-size: 12px')
-            ui.label('✅ 文件完整性验证通过').style('color: green')
+        if hash_result is None:
+            # 尚未完成首次校验
+            core_status.set_text(f'选择的核心文件: {core_filename}')
+            core_status.style('color: gray')
+            hash_status.set_text('状态: 正在校验核心文件...')
+            hash_status.style('color: gray')
+            return
         
-    else:
-        # Hash校验失败
-        core_status.set_text(f'选择的核心文件: {core_filename} (已找到)')
-        core_status.style('color: orange')
-        hash_status.set_text(f'状态: {hash_result["message"]}')
-        hash_status.style('color: orange')
+        download_button.set_text('更新核心文件' if hash_result['exists'] else '下载核心文件')
         
-        # Hash不匹配时显示更新按键
-        ui.label('检测到文件需要更新').style('color: orange; margin-top: 10px')
+        if not hash_result['exists']:
+            # 文件不存在
+            core_status.set_text(f'选择的核心文件: {core_filename} (未找到)')
+            core_status.style('color: red')
+            hash_status.set_text('状态: 核心文件不存在')
+            hash_status.style('color: red')
+            
+            # 核心不存在时显示下载按键
+            with hint_container:
+                ui.label('核心文件未找到，请下载对应版本的核心文件').style('color: orange; margin-top: 10px')
+            
+        elif hash_result['valid']:
+            # Hash校验通过
+            core_status.set_text(f'选择的核心文件: {core_filename} (已找到)')
+            core_status.style('color: green')
+            hash_status.set_text('状态: Hash校验通过，文件完整')
+            hash_status.style('color: green')
+            
+            # 显示详细信息
+            with details_expansion:
+                hash_source_text = {'backup': '（备用）', 'cache': '（离线缓存）'}.get(hash_result.get('hash_source'), '')
+                ui.label(f'官方Hash{hash_source_text}: {hash_result["official_hash"]}').style('font-family: monospace; font-size: 12px')
+                ui.label(f'本地Hash: {hash_result["local_hash"]}').style('font-family: monospace; font-size: 12px')
+                ui.label('✅ 文件完整性验证通过').style('color: green')
+            
+        else:
+            # Hash校验失败
+            core_status.set_text(f'选择的核心文件: {core_filename} (已找到)')
+            core_status.style('color: orange')
+            hash_status.set_text(f'状态: {hash_result["message"]}')
+            hash_status.style('color: orange')
+            
+            # Hash不匹配时显示更新按键
+            with hint_container:
+                ui.label('检测到文件需要更新').style('color: orange; margin-top: 10px')
+            
+            # 显示详细信息
+            with details_expansion:
+                hash_source_text = {'backup': '（备用）', 'cache': '（离线缓存）'}.get(hash_result.get('hash_source'), '')
+                ui.label(f'官方Hash{hash_source_text}: {hash_result.get("official_hash", "无法获取")}').style('font-family: monospace; font-size: 12px')
+                ui.label(f'本地Hash: {hash_result.get("local_hash", "无法计算")}').style('font-family: monospace; font-size: 12px')
+                ui.label('❌ 文件完整性验证失败').style('color: red')
         
-        # 显示详细信息
-        details_expansion.clear()
-        with details_expansion:
-            hash_source_text = '（备用）' if hash_result.get('hash_source') == 'backup' else ''
-            ui.label(f'官方Hash{hash_source_text}: {hash_result.get("official_hash", "无法获取")}').style('font-family: monospace; font-size: 12px')
-            ui.label(f'本地Hash: {hash_result.get("local_hash", "无法计算")}').style('font-family: monospace; font-size: 12px')
-            ui.label('❌ 文件完整性验证失败').style('color: red')
+        if state['status'] == 'checking':
+            hash_status.set_text(f'{hash_status.text}（正在重新校验...）')
     
     # 创建下载/更新按钮
     async def download_core():
@@ -193,8 +215,9 @@ def create_home_page():
             )
             
             if result['success']:
-                # 下载成功，刷新页面状态
+                # 下载成功，重新校验后刷新页面状态
                 await asyncio.sleep(2)  # 等待2秒让用户看到完成信息
+                await core_verifier.verify()
                 ui.navigate.reload()  # 刷新页面
             
         except Exception as e:
@@ -207,12 +230,12 @@ def create_home_page():
     
     # 根据文件状态显示不同的按钮
     with ui.row().style('margin-top: 10px'):
-        button_text = '更新核心文件' if hash_result['exists'] else '下载核心文件'
-        ui.button(button_text, on_click=download_core)
+        download_button = ui.button('下载核心文件', on_click=download_core)
         
-        # 添加刷新按钮
+        # 添加刷新按钮，在后台重新获取官方hash清单并校验
         async def refresh_status():
-            ui.navigate.reload()
+            core_verifier.request_verify(force_refresh=True)
+            ui.notify('正在检查更新...')
         
         ui.button('检查更新', on_click=refresh_status).style('margin-left: 10px')
     
@@ -224,6 +247,10 @@ def create_home_page():
     if not config_exists:
         ui.label('请先创建配置文件或前往设置页面进行配置').style('color: orange; margin-top: 5px')
     
+    # 使用后台校验器缓存的状态立即渲染，校验完成后实时更新
+    render_hash_state(core_verifier.get_state())
+    core_verifier.subscribe(render_hash_state)
+    
     return {
         'update_core_running_display': update_core_running_display
     }
\ No newline at end of file
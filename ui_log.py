@@ -4,17 +4,339 @@
 """
 
 import asyncio
+import time
+import itertools
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
 from nicegui import ui
 from loguru import logger
 
-from core_manager import CoreManager
+from core_manager import core_manager
 from config_manager import config_manager
 from system_info import system_info
 from log_manager import log_manager
+from log_index import log_index
+from log_parser import classify_level
+import core_status as core_status_bus
+from utils import patch_table_rows
 from core_status import update_core_status, get_core_status
 
-# 创建全局实例
-core_manager = CoreManager()
+
+# 日志等级对应的CSS类名
+LOG_LEVEL_STYLES = {
+    'error': 'text-red',
+    'warning': 'text-orange',
+    'success': 'text-green',
+    'info': 'text-blue',
+    'debug': 'text-gray',
+    'fata': 'text-fata'  # FATA致命错误使用特殊样式
+}
+
+# 搜索日志时可选的等级
+LOG_LEVEL_OPTIONS = {
+    '': '全部等级',
+    'error': '错误',
+    'warning': '警告',
+    'info': '信息',
+    'success': '成功',
+    'debug': '调试',
+    'fata': '致命'
+}
+
+# 搜索日志时可选的时间范围（秒）
+LOG_TIME_RANGE_OPTIONS = {
+    0: '全部时间',
+    3600: '最近1小时',
+    86400: '最近24小时',
+    7 * 86400: '最近7天'
+}
+
+# 日志推送的刷新间隔（秒）
+LOG_FLUSH_INTERVAL = 0.1
+
+
+class LogPushBuffer:
+    """
+    每个页面独立的日志推送缓冲区
+    
+    核心日志先放入缓冲区，由页面定时器按固定间隔一次性推送给浏览器，
+    突发输出时每个客户端每个间隔只更新一次。积压超过max_lines行时丢弃最旧的日志，
+    这些日志即使推送也会立刻被挤出显示区域
+    """
+    
+    def __init__(self, push_lines: Callable[[List[Tuple[str, str]]], None], max_lines: int = 1000):
+        """
+        Args:
+            push_lines: 把一批(日志文本, 日志等级)推送到页面的函数
+            max_lines: 缓冲区最多保留的行数，与显示区域的最大行数一致
+        """
+        self.push_lines = push_lines
+        self.max_lines = max_lines
+        self._pending: deque = deque()
+        self.stats = {
+            'received': 0,
+            'pushed': 0,
+            'flushes': 0,
+            'coalesced': 0,  # 与其他日志合并在同一次更新中推送的行数
+            'dropped': 0  # 积压过多而未推送的行数
+        }
+    
+    def append(self, line: str, level: str) -> None:
+        """加入一行待推送的日志"""
+        if len(self._pending) >= self.max_lines:
+            self._pending.popleft()
+            self.stats['dropped'] += 1
+        self._pending.append((line, level))
+        self.stats['received'] += 1
+    
+    def flush(self) -> int:
+        """
+        推送缓冲区中的所有日志
+        
+        Returns:
+            int: 本次推送的行数
+        """
+        # 逐个取出，避免与其他线程的append竞争时丢失日志
+        batch = [self._pending.popleft() for _ in range(len(self._pending))]
+        if not batch:
+            return 0
+        
+        self.push_lines(batch)
+        self.stats['pushed'] += len(batch)
+        self.stats['flushes'] += 1
+        self.stats['coalesced'] += len(batch) - 1
+        return len(batch)
+    
+    def clear(self) -> None:
+        """丢弃所有待推送的日志"""
+        self._pending.clear()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取推送统计信息"""
+        stats = self.stats.copy()
+        stats['pending'] = len(self._pending)
+        return stats
+
+
+class LogViewer:
+    """
+    虚拟滚动的日志查看器
+    
+    基于带virtual-scroll的ui.table，浏览器只渲染可见区域内的行。服务端最多保留max_rows行的窗口：
+    跟随最新日志时新日志追加到末尾并丢弃最旧的行，滚动到顶部时通过日志管理器的游标
+    按页加载更早的日志，此时丢弃最新的行，新日志只计数，点击"回到最新日志"后重新加载。
+    窗口变化时只把新增的行和丢弃的行数发给浏览器，不重新发送整个表格
+    """
+    
+    ROW_SLOT = r'''
+        <q-td :props="props" :class="props.row.cls"
+              style="font-family: monospace; font-size: 12px; white-space: pre-wrap; word-break: break-all; padding: 1px 10px; height: auto">
+            {{ props.value }}
+        </q-td>
+    '''
+    
+    # 在浏览器中就地修改窗口的行
+    PATCH_SCRIPT = '''
+        if (patch.replace) element.props.rows = patch.replace;
+        const rows = element.props.rows;
+        if (patch.prepend) rows.unshift(...patch.prepend);
+        if (patch.append) rows.push(...patch.append);
+        if (patch.trim_start) rows.splice(0, patch.trim_start);
+        if (patch.trim_end) rows.splice(rows.length - patch.trim_end, patch.trim_end);
+    '''
+    
+    def __init__(self, max_rows: int = 1000, page_size: int = 200):
+        """
+        Args:
+            max_rows: 窗口最多保留的行数
+            page_size: 每次加载的历史日志行数
+        """
+        self.max_rows = max_rows
+        self.page_size = page_size
+        # 窗口是否包含最新的日志
+        self.following = True
+        # 更早日志的游标，已加载到最早的日志时为None
+        self.cursor: Optional[Dict] = None
+        # 跟随最新日志时窗口顶部丢弃过行，游标不再与窗口顶部相接
+        self._top_trimmed = False
+        self._loading = False
+        # 不在最新位置时收到的新日志数
+        self.missed = 0
+        self._new_ids = itertools.count()
+        self._old_ids = itertools.count(-1, -1)
+        # 页面的日志推送缓冲区，重新加载最新日志前清空，避免已写入文件的日志再推送一次
+        self.push_buffer: Optional[LogPushBuffer] = None
+        
+        self.table = ui.table(
+            columns=[{'name': 'text', 'label': '', 'field': 'text', 'align': 'left'}],
+            rows=[],
+            row_key='id'
+        ).props('virtual-scroll dense flat bordered hide-header hide-bottom virtual-scroll-item-size=20') \
+         .style('width: 100%; height: 500px')
+        self.table.add_slot('body-cell-text', self.ROW_SLOT)
+        # 只传递处理函数用到的参数，事件中的其他字段（如组件引用）无法序列化
+        self.table.on('virtual-scroll', self._on_virtual_scroll, args=[['from', 'direction']])
+        
+        with ui.row().style('align-items: center; gap: 10px'):
+            self.status_label = ui.label('').style('font-size: 12px; color: gray')
+            self.latest_button = ui.button('回到最新日志', on_click=self.load_latest).props('flat dense size=sm')
+            self.latest_button.set_visibility(False)
+    
+    @property
+    def is_deleted(self) -> bool:
+        """页面是否已被销毁"""
+        return self.table.is_deleted
+    
+    def _make_rows(self, items: List[Tuple[str, Optional[str]]], older: bool = False) -> List[Dict]:
+        """把(文本, CSS类名)转换为表格行，更早的日志使用递减的行ID"""
+        ids = self._old_ids if older else self._new_ids
+        return [{'id': next(ids), 'text': text, 'cls': cls or ''} for text, cls in items]
+    
+    def _update_rows(self, replace: Optional[List[Dict]] = None, prepend: Optional[List[Dict]] = None,
+                     append: Optional[List[Dict]] = None, trim_start: int = 0, trim_end: int = 0) -> None:
+        """
+        按顺序修改窗口的行：替换、插入到顶部、追加到末尾、从顶部丢弃、从末尾丢弃
+        
+        只把变化发给浏览器就地修改，见utils.patch_table_rows
+        
+        Args:
+            replace: 替换全部行
+            prepend: 插入到顶部的行
+            append: 追加到末尾的行
+            trim_start: 从顶部丢弃的行数
+            trim_end: 从末尾丢弃的行数
+        """
+        patch = {}
+        if replace is not None:
+            patch['replace'] = replace
+        if prepend:
+            patch['prepend'] = prepend
+        if append:
+            patch['append'] = append
+        if trim_start > 0:
+            patch['trim_start'] = trim_start
+        if trim_end > 0:
+            patch['trim_end'] = trim_end
+        if not patch:
+            return
+        
+        def update_rows(rows: List[Dict]) -> None:
+            if replace is not None:
+                rows[:] = replace
+            if prepend:
+                rows[:0] = prepend
+            if append:
+                rows.extend(append)
+            if trim_start > 0:
+                del rows[:trim_start]
+            if trim_end > 0:
+                del rows[len(rows) - trim_end:]
+        
+        patch_table_rows(self.table, update_rows, self.PATCH_SCRIPT, patch)
+    
+    def _append(self, items: List[Tuple[str, Optional[str]]]) -> None:
+        """在窗口末尾追加日志，超出max_rows时丢弃最旧的行"""
+        if not self.following:
+            self.missed += len(items)
+            self.status_label.set_text(f'正在查看历史日志，有 {self.missed} 条新日志')
+            return
+        
+        new_rows = self._make_rows(items)[-self.max_rows:]
+        excess = len(self.table.rows) + len(new_rows) - self.max_rows
+        if excess > 0:
+            self._top_trimmed = True
+        self._update_rows(append=new_rows, trim_start=excess)
+        self.table.run_method('scrollTo', len(self.table.rows) - 1)
+    
+    def push(self, line, classes: Optional[str] = None) -> None:
+        """追加一行日志，用法与ui.log.push相同"""
+        self._append([(text, classes) for text in str(line).splitlines()])
+    
+    def push_lines(self, batch: List[Tuple[str, str]]) -> None:
+        """追加一批(日志文本, 日志等级)"""
+        self._append([(line, LOG_LEVEL_STYLES.get(level, 'text-gray')) for line, level in batch])
+    
+    def clear(self) -> None:
+        """清空显示"""
+        self._update_rows(replace=[])
+        self.cursor = None
+        self._top_trimmed = False
+    
+    @staticmethod
+    def _style_lines(lines: List[str]) -> List[Tuple[str, str]]:
+        """按日志等级为历史日志设置样式"""
+        return [(line, LOG_LEVEL_STYLES.get(classify_level(line), 'text-gray')) for line in lines]
+    
+    async def load_latest(self) -> int:
+        """
+        从日志文件末尾加载最新的一页日志并跟随最新日志
+        
+        Returns:
+            int: 加载的行数
+        """
+        if self.push_buffer is not None:
+            # 缓冲区中的日志已经保存，会包含在从文件加载的日志中
+            self.push_buffer.clear()
+        lines, self.cursor = await asyncio.to_thread(log_manager.load_logs_page, None, self.page_size)
+        self._update_rows(replace=self._make_rows(self._style_lines(lines)))
+        self.following = True
+        self._top_trimmed = False
+        self.missed = 0
+        self.status_label.set_text('')
+        self.latest_button.set_visibility(False)
+        if lines:
+            self.table.run_method('scrollTo', len(lines) - 1)
+        return len(lines)
+    
+    async def load_older(self) -> int:
+        """
+        在窗口顶部加载更早的一页日志
+        
+        Returns:
+            int: 加载的行数
+        """
+        if self._loading:
+            return 0
+        self._loading = True
+        try:
+            if self._top_trimmed:
+                # 窗口顶部已被丢弃，按当前窗口的行数重新定位游标
+                lines, self.cursor = await asyncio.to_thread(log_manager.load_logs_page, None, len(self.table.rows))
+                self._update_rows(replace=self._make_rows(self._style_lines(lines)))
+                self._top_trimmed = False
+            
+            if self.cursor is None:
+                self.status_label.set_text('已加载全部历史日志')
+                return 0
+            
+            lines, self.cursor = await asyncio.to_thread(log_manager.load_logs_page, self.cursor, self.page_size)
+            if not lines:
+                return 0
+            
+            # 更早的日志ID递减，按从新到旧的顺序分配后再反转
+            older_rows = self._make_rows(self._style_lines(lines[::-1]), older=True)[::-1]
+            excess = len(self.table.rows) + len(older_rows) - self.max_rows
+            self._update_rows(prepend=older_rows, trim_end=excess)
+            if excess > 0:
+                # 窗口已满，丢弃最新的行，停止跟随最新日志
+                self.following = False
+                self.latest_button.set_visibility(True)
+                self.status_label.set_text('正在查看历史日志')
+            
+            # 保持当前可见的内容位置不变
+            self.table.run_method('scrollTo', len(older_rows))
+            return len(older_rows)
+        except Exception as e:
+            logger.error(f"加载更早的日志失败: {str(e)}")
+            return 0
+        finally:
+            self._loading = False
+    
+    async def _on_virtual_scroll(self, e) -> None:
+        """滚动到顶部时加载更早的日志"""
+        args = e.args or {}
+        if args.get('from') == 0 and args.get('direction') == 'decrease':
+            await self.load_older()
 
 
 def create_log_page():
@@ -29,9 +351,21 @@ def create_log_page():
     ui.label(f'核心文件: {core_filename}').style('font-size: 14px; margin-bottom: 5px')
     ui.label(f'配置文件: {config_file_path}').style('font-size: 14px; margin-bottom: 20px')
     
-    # 使用ui.log()组件显示日志
-    log_display = ui.log().style('width: 100%; height: 500px; font-family: monospace; font-size: 12px; overflow-y: auto; border: 1px solid #ccc; padding: 10px')
-
+    # 使用虚拟滚动的日志查看器显示日志，最多保留max_log_lines行，滚动到顶部时加载更早的日志
+    log_display = LogViewer(max_rows=log_manager.max_log_lines)
+    push_stats_label = ui.label('').style('font-size: 12px; color: gray')
+    
+    push_buffer = LogPushBuffer(log_display.push_lines, log_manager.max_log_lines)
+    log_display.push_buffer = push_buffer
+    
+    # 定时把缓冲区中的日志一次性推送到页面
+    def flush_logs():
+        if push_buffer.flush():
+            stats = push_buffer.get_stats()
+            if stats['coalesced'] or stats['dropped']:
+                push_stats_label.set_text(f"已合并推送 {stats['coalesced']} 行，积压丢弃 {stats['dropped']} 行")
+    
+    ui.timer(LOG_FLUSH_INTERVAL, flush_logs)
     
     # 控制按钮
     with ui.row().style('margin-top: 20px; margin-bottom: 20px'):
@@ -46,13 +380,49 @@ def create_log_page():
     # 核心运行状态显示
     status_label = ui.label('').style('font-size: 14px; margin-bottom: 10px; font-weight: bold')
     
+    # 搜索当前日志和归档日志
+    async def search_logs():
+        started = time.perf_counter()
+        search_status.set_text('正在搜索...')
+        try:
+            since = time.time() - range_select.value if range_select.value else None
+            results = await log_index.search_async(
+                search_input.value or '',
+                level=level_select.value or None,
+                since=since,
+                task_id=(task_input.value or '').strip() or None
+            )
+        except Exception as e:
+            logger.error(f"搜索日志失败: {str(e)}")
+            search_status.set_text(f'搜索日志失败: {str(e)}')
+            return
+        
+        search_results.clear()
+        with search_results:
+            for result in results:
+                ui.label(result['message']).classes(LOG_LEVEL_STYLES.get(result['level'], 'text-gray'))
+        elapsed = (time.perf_counter() - started) * 1000
+        search_status.set_text(f'找到 {len(results)} 条结果（耗时 {elapsed:.0f} 毫秒）')
+    
+    with ui.expansion('搜索日志', icon='search').style('width: 100%; margin-bottom: 10px'):
+        with ui.row().style('align-items: center; gap: 10px'):
+            search_input = ui.input('关键词').props('clearable').on('keydown.enter', search_logs)
+            level_select = ui.select(LOG_LEVEL_OPTIONS, value='', label='等级').style('min-width: 120px')
+            range_select = ui.select(LOG_TIME_RANGE_OPTIONS, value=0, label='时间范围').style('min-width: 140px')
+            task_input = ui.input('任务ID').on('keydown.enter', search_logs)
+            ui.button('搜索', on_click=search_logs)
+        search_status = ui.label('').style('font-size: 12px; color: gray')
+        search_results = ui.column().style('width: 100%; max-height: 400px; overflow-y: auto; font-family: monospace; font-size: 12px; gap: 2px')
+    
     # 初始化按钮状态
-    async def update_button_states():
-        # 更新全局缓存变量core中的核心状态
-        update_core_status()
+    def update_button_states(status=None):
+        # 页面已被销毁时取消订阅
+        if status_label.is_deleted:
+            core_status_bus.unsubscribe(update_button_states)
+            return
         
-        # 使用全局缓存变量core中的状态信息
-        is_running = get_core_status()['is_running']
+        # 使用状态总线推送的状态，未提供时读取全局缓存变量core
+        is_running = (status or get_core_status())['is_running']
         
         # 更新按钮状态
         if start_button and stop_button:
@@ -68,22 +438,15 @@ def create_log_page():
                 status_label.set_text('核心状态: 已停止')
                 status_label.style('color: red')
     
-    # 页面加载时初始化按钮状态
-    ui.timer(0.1, lambda: update_button_states(), once=True)
-    
-    # 定期更新按钮状态（每2秒检查一次）
-    ui.timer(2.0, lambda: update_button_states())
+    # 页面加载时初始化按钮状态，之后由状态总线推送更新
+    update_button_states()
+    core_status_bus.subscribe(update_button_states)
     
     # 页面加载时恢复之前的日志
     async def load_previous_logs():
         try:
-            previous_logs = log_manager.load_logs()
-            if previous_logs:
-                #log_display.push('=== 恢复之前的日志 ===')
-                for log_line in previous_logs:
-                    log_display.push(log_line)
-                #log_display.push('=== 日志恢复完成 ===')
-            else:
+            # 只从日志文件末尾加载最新的一页，更早的日志在滚动到顶部时再加载
+            if not await log_display.load_latest():
                 log_display.push('日志页面已打开')
                 log_display.push(f'核心文件: {core_filename}')
                 log_display.push(f'配置文件: {config_file_path}')
@@ -97,33 +460,26 @@ def create_log_page():
             log_display.push('点击"开始运行"启动核心')
     
     # 页面加载完成后恢复日志
-    ui.timer(0.1, lambda: load_previous_logs(), once=True)
+    ui.timer(0, lambda: load_previous_logs(), once=True)
     
     # 添加日志回调函数
     def log_callback(log_line, log_level):
-        # 根据日志等级设置对应的CSS类名
-        style_map = {
-            'error': 'text-red',
-            'warning': 'text-orange', 
-            'success': 'text-green',
-            'info': 'text-blue',
-            'debug': 'text-gray',
-            'fata': 'text-fata'  # FATA致命错误使用特殊样式
-        }
-        style = style_map.get(log_level, 'text-gray')
+        # 页面已被销毁时取消回调
+        if log_display.is_deleted:
+            core_manager.remove_log_callback(log_callback)
+            return
         
-        # 使用classes参数推送带样式的日志
-        log_display.push(log_line.strip(), classes=style)
-        # 同时保存到持久化存储（保存原始文本）
-        log_manager.save_log(log_line.strip())
+        # 放入推送缓冲区，由定时器按等级样式批量推送，持久化由core_manager负责
+        push_buffer.append(log_line.strip(), log_level)
     
     # 清空日志的函数
     async def clear_logs(log_display):
         try:
-            # 清空显示
+            # 清空显示和未推送的日志
+            push_buffer.clear()
             log_display.clear()
-            # 清空持久化存储
-            if log_manager.clear_logs():
+            # 清空持久化存储，需要等待写入队列，在线程中执行避免阻塞事件循环
+            if await asyncio.to_thread(log_manager.clear_logs):
                 log_display.push('日志已清空')
                 log_manager.save_log('用户手动清空日志')
             else:
@@ -145,8 +501,11 @@ def create_log_page():
             status_label.style('color: orange')
         
         try:
-            # 使用core_manager启动核心
-            success = core_manager.start_core(str(config_file_path))
+            # 使用core_manager启动核心，按配置选择asyncio子进程或线程方式
+            if config_manager.get_config('core_backend') == 'thread':
+                success = core_manager.start_core(str(config_file_path))
+            else:
+                success = await core_manager.start_core_async(str(config_file_path))
             
             if success:
                 # 添加日志回调
@@ -203,7 +562,7 @@ def create_log_page():
         
         try:
             # 使用core_manager停止核心
-            success = core_manager.stop_core()
+            success = await core_manager.stop_core_async()
             
             if success:
                 # 移除日志回调
@@ -250,6 +609,7 @@ def create_log_page():
     
     return {
         'update_button_states': update_button_states,
+        'push_buffer': push_buffer,
         'log_callback': log_callback,
         'run_core': run_core,
         'stop_core': stop_core,
@@ -0,0 +1,193 @@
+"""
+任务页面UI模块
+负责显示下载任务的列表、进度和下载速度
+"""
+
+from typing import Any, Dict, List
+from nicegui import ui
+from loguru import logger
+
+from core_manager import core_manager
+from task_table import task_table
+from utils import patch_table_rows
+
+
+# 任务页面刷新的间隔（秒）
+TASK_FLUSH_INTERVAL = 0.25
+
+# 任务状态的显示文本和颜色
+TASK_STATE_LABELS = {
+    'unknown': ('未知', 'grey'),
+    'queued': ('排队中', 'grey'),
+    'downloading': ('下载中', 'primary'),
+    'paused': ('已暂停', 'orange'),
+    'completed': ('已完成', 'positive'),
+    'failed': ('失败', 'negative'),
+    'cancelled': ('已取消', 'grey')
+}
+
+
+class TaskView:
+    """
+    虚拟滚动的任务列表
+    
+    基于带virtual-scroll的ui.table，浏览器只渲染可见区域内的行。打开页面时发送一次全部行，
+    之后每个刷新间隔只把变化的行和删除的任务ID发给浏览器，在浏览器中就地修改表格数据，
+    服务端的行同步修改但不触发整个表格的更新
+    """
+    
+    COLUMNS = [
+        {'name': 'title', 'label': '名称', 'field': 'title', 'align': 'left', 'sortable': True},
+        {'name': 'state', 'label': '状态', 'field': 'state', 'align': 'center', 'sortable': True},
+        {'name': 'progress', 'label': '进度', 'field': 'progress', 'align': 'left', 'sortable': True,
+         'style': 'width: 30%'},
+        {'name': 'size', 'label': '大小', 'field': 'size', 'align': 'right'},
+        {'name': 'speed', 'label': '速度', 'field': 'speed', 'align': 'right'}
+    ]
+    
+    STATE_SLOT = r'''
+        <q-td :props="props">
+            <q-badge :color="props.row.color" :label="props.value" />
+        </q-td>
+    '''
+    
+    PROGRESS_SLOT = r'''
+        <q-td :props="props">
+            <q-linear-progress :value="props.value / 100" size="14px" rounded color="primary" track-color="grey-3">
+                <div class="absolute-full flex flex-center" style="font-size: 11px">{{ props.value.toFixed(1) }}%</div>
+            </q-linear-progress>
+        </q-td>
+    '''
+    
+    # 在浏览器中就地更新和删除行
+    PATCH_SCRIPT = '''
+        const rows = element.props.rows;
+        const positions = new Map(rows.map((row, i) => [row.id, i]));
+        for (const row of patch.rows) {
+            const i = positions.get(row.id);
+            if (i === undefined) rows.push(row);
+            else rows[i] = row;
+        }
+        if (patch.removed.length) {
+            const removed = new Set(patch.removed);
+            element.props.rows = rows.filter((row) => !removed.has(row.id));
+        }
+    '''
+    
+    def __init__(self):
+        self.seq = 0
+        self._positions: Dict[str, int] = {}
+        
+        self.table = ui.table(
+            columns=self.COLUMNS,
+            rows=[],
+            row_key='id',
+            pagination=0
+        ).props('virtual-scroll dense flat bordered hide-bottom virtual-scroll-item-size=33') \
+         .style('width: 100%; height: 600px')
+        self.table.add_slot('body-cell-state', self.STATE_SLOT)
+        self.table.add_slot('body-cell-progress', self.PROGRESS_SLOT)
+        self.reload()
+    
+    @property
+    def is_deleted(self) -> bool:
+        """页面是否已被销毁"""
+        return self.table.is_deleted
+    
+    @staticmethod
+    def _make_row(row: Dict[str, Any]) -> Dict[str, Any]:
+        """把任务表的一行转换为表格行"""
+        label, color = TASK_STATE_LABELS.get(row['state'], TASK_STATE_LABELS['unknown'])
+        total = row['total']
+        return {
+            'id': row['id'],
+            'title': row['title'] or row['id'],
+            'state': label,
+            'color': color,
+            'progress': round(row['done'] / total * 100, 1) if total > 0 else 0.0,
+            'size': f"{core_manager.format_file_size(row['done'])} / {core_manager.format_file_size(total)}",
+            'speed': core_manager.format_speed(row['speed']) if row['speed'] else ''
+        }
+    
+    def reload(self) -> None:
+        """重新发送全部行"""
+        self.seq, rows = task_table.get_rows()
+        self.table.rows[:] = [self._make_row(row) for row in rows]
+        self._positions = {row['id']: i for i, row in enumerate(self.table.rows)}
+    
+    def refresh(self) -> int:
+        """
+        把任务表中变化的行发送到浏览器
+        
+        Returns:
+            int: 发送的行数
+        """
+        changes = task_table.changes_since(self.seq)
+        if changes is None:
+            # 落后太多，删除记录已不完整
+            self.reload()
+            return len(self.table.rows)
+        
+        self.seq, changed, removed = changes
+        if not changed and not removed:
+            return 0
+        
+        rows = [self._make_row(row) for row in changed]
+        
+        # 服务端保留同样的数据，页面重新连接时发送的是最新的行
+        def update_rows(table_rows: List[Dict[str, Any]]) -> None:
+            for row in rows:
+                position = self._positions.get(row['id'])
+                if position is None:
+                    self._positions[row['id']] = len(table_rows)
+                    table_rows.append(row)
+                else:
+                    table_rows[position] = row
+            if removed:
+                removed_ids = set(removed)
+                table_rows[:] = [row for row in table_rows if row['id'] not in removed_ids]
+                self._positions = {row['id']: i for i, row in enumerate(table_rows)}
+        
+        patch_table_rows(self.table, update_rows, self.PATCH_SCRIPT, {'rows': rows, 'removed': removed})
+        return len(rows) + len(removed)
+
+
+def create_tasks_page():
+    """创建任务页面UI组件"""
+    
+    ui.label('下载任务').style('font-size: 24px; font-weight: bold; margin-bottom: 20px')
+    
+    summary_label = ui.label('').style('font-size: 14px; margin-bottom: 10px')
+    task_view = TaskView()
+    
+    def update_summary():
+        if not len(task_table):
+            summary_label.set_text('暂无下载任务')
+            return
+        
+        counts = task_table.count_by_state()
+        parts = [f"共 {len(task_table)} 个任务"]
+        for task_state, (label, _) in TASK_STATE_LABELS.items():
+            if counts.get(task_state):
+                parts.append(f"{label} {counts[task_state]}")
+        speed = task_table.get_total_speed()
+        if speed:
+            parts.append(f"总速度 {core_manager.format_speed(speed)}")
+        summary_label.set_text('，'.join(parts))
+    
+    def refresh_tasks():
+        try:
+            # 没有新的进度推送时，也需要清理过期的任务
+            task_table.tick()
+            task_view.refresh()
+            update_summary()
+        except Exception as e:
+            logger.error(f"刷新任务列表失败: {str(e)}")
+    
+    update_summary()
+    ui.timer(TASK_FLUSH_INTERVAL, refresh_tasks)
+    
+    return {
+        'task_view': task_view,
+        'summary_label': summary_label
+    }
@@ -1,5 +1,7 @@
 import asyncio
+import json
 from pathlib import Path
+from typing import Any, Callable, Dict, List
 from nicegui import ui
 import platform
 from loguru import logger
@@ -113,4 +115,42 @@ def create_file_browser_button(input_field, dialog_title="选择路径", select_
             logger.error(f'选择文件时出错: {str(e)}')
             ui.notify(f'选择文件时出错: {str(e)}', type='negative')
     
-    return browse_file
\ No newline at end of file
+    return browse_file
+
+
+# 在浏览器中修改表格行的脚本模板，script中可以使用element（表格组件）和patch（补丁数据）
+TABLE_PATCH_TEMPLATE = '''
+    (() => {
+        const element = window.mounted_app && window.mounted_app.elements[%d];
+        if (!element) return;
+        const patch = %s;
+        %s
+    })()
+'''
+
+def patch_table_rows(table: ui.table, update_rows: Callable[[List[Dict[str, Any]]], None],
+                     script: str, patch: Dict[str, Any]) -> None:
+    """
+    修改表格的行，只把变化发给浏览器，不重新发送整个表格
+    
+    服务端的行在暂停属性更新时修改，页面重新连接时仍能显示最新的行；浏览器中的行由script就地修改。
+    这里依赖NiceGUI的内部接口（Props.suspend_updates和浏览器中的mounted_app），
+    接口不可用或页面尚未连接时直接修改并通过table.update()发送整个表格
+    
+    Args:
+        table: 表格
+        update_rows: 在服务端修改行的函数，参数为表格的行列表
+        script: 在浏览器中修改行的脚本
+        patch: 传给script的补丁数据，需要能序列化为JSON
+    """
+    suspend_updates = getattr(getattr(table, '_props', None), 'suspend_updates', None)
+    if suspend_updates is None or not table.client.has_socket_connection:
+        update_rows(table.rows)
+        table.update()
+        return
+    
+    with suspend_updates():
+        update_rows(table.rows)
+    code = TABLE_PATCH_TEMPLATE % (table.id, json.dumps(patch, ensure_ascii=False), script)
+    # 发送到表格所在的页面，多个页面同时打开时互不影响
+    table.client.run_javascript(code)